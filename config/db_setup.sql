@@ -1,18 +1,177 @@
--- Setup database and tables (run once)
-CREATE TABLE IF NOT EXISTS news (
+-- Setup database and tables (safe to re-run)
+--
+-- Databases created before the news_core / news_text split: run
+-- migrate_emotion_columns.sql, migrate_dimensions.sql and
+-- migrate_news_split.sql from this directory, in that order, first.
+
+-- Source and author names, stored once and referenced by id from news
+-- (scripts/dimensions.py)
+CREATE TABLE IF NOT EXISTS sources (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS authors (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+-- Narrow per-article metadata and scores: everything the analytics
+-- (dashboards, rollup, relabel) scan
+CREATE TABLE IF NOT EXISTS news_core (
     id SERIAL PRIMARY KEY,
-    source TEXT,
-    author TEXT,
+    source_id INTEGER REFERENCES sources(id),
+    author_id INTEGER REFERENCES authors(id),
     title TEXT,
-    description TEXT,
     url TEXT UNIQUE,          -- Prevent duplicates
     published_at TIMESTAMP,
-    content TEXT,
     country VARCHAR(2),
-    sentiment_score FLOAT,
-    sentiment_label VARCHAR(8)
+    sentiment_score FLOAT,    -- TextBlob polarity
+    -- TextBlob subjectivity, stored with polarity so labels can be
+    -- recomputed without re-scoring: `globalnews.py relabel`
+    sentiment_subjectivity FLOAT,
+    sentiment_label VARCHAR(8),
+    -- One REAL per emotion (scripts/news_schema.py); NULL when the emotion
+    -- wasn't found, all NULL for text without emotional words
+    emotion_joy REAL,
+    emotion_anger REAL,
+    emotion_sadness REAL,
+    emotion_fear REAL,
+    emotion_surprise REAL,
+    emotion_trust REAL,
+    emotion_disgust REAL,
+    emotion_anticipation REAL,
+    -- Set once the analyzer (or pipeline.py) has scored the row
+    analyzed_at TIMESTAMP,
+    -- MD5 of the normalised title/description/content (fetch_news.content_hash).
+    -- save_to_db only rewrites an existing url when this changes, and clears
+    -- its analysis so the analyzer re-scores it.
+    content_hash CHAR(32)
 );
 
 -- Add indexes for faster queries
-CREATE INDEX IF NOT EXISTS idx_country ON news(country);
-CREATE INDEX IF NOT EXISTS idx_published ON news(published_at);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_country ON news_core(country);
+CREATE INDEX IF NOT EXISTS idx_published ON news_core(published_at);
+CREATE INDEX IF NOT EXISTS idx_source ON news_core(source_id);
+CREATE INDEX IF NOT EXISTS idx_unanalyzed ON news_core(id) WHERE analyzed_at IS NULL;
+
+-- Article body text, read only by the analyzer and exports. Kept out of
+-- news_core so analytical scans touch a fraction of the pages.
+CREATE TABLE IF NOT EXISTS news_text (
+    id INTEGER PRIMARY KEY REFERENCES news_core(id) ON DELETE CASCADE,
+    description TEXT,
+    content TEXT
+);
+
+-- The original wide shape, so `SELECT title, content ... FROM news` keeps
+-- working. Left joins on a unique key that a query doesn't read are
+-- removed by the planner, so scores-only queries still scan news_core alone.
+CREATE OR REPLACE VIEW news AS
+SELECT c.id, sources.name AS source, authors.name AS author, c.title,
+       t.description, c.url, c.published_at, t.content, c.country,
+       c.sentiment_score, c.sentiment_subjectivity, c.sentiment_label,
+       c.emotion_joy, c.emotion_anger, c.emotion_sadness, c.emotion_fear,
+       c.emotion_surprise, c.emotion_trust, c.emotion_disgust, c.emotion_anticipation,
+       c.analyzed_at, c.content_hash, c.source_id, c.author_id
+FROM news_core AS c
+LEFT JOIN news_text AS t ON t.id = c.id
+LEFT JOIN sources ON sources.id = c.source_id
+LEFT JOIN authors ON authors.id = c.author_id;
+
+-- The old JSONB shape, for queries that still read `emotions`
+CREATE OR REPLACE VIEW news_emotions AS
+SELECT id, NULLIF(jsonb_strip_nulls(jsonb_build_object(
+    'joy', emotion_joy, 'anger', emotion_anger, 'sadness', emotion_sadness,
+    'fear', emotion_fear, 'surprise', emotion_surprise, 'trust', emotion_trust,
+    'disgust', emotion_disgust, 'anticipation', emotion_anticipation
+)), '{}'::jsonb) AS emotions
+FROM news_core;
+
+-- Newest published_at already ingested per (country, category), so
+-- fetch_news can drop stale headlines before touching the news table
+CREATE TABLE IF NOT EXISTS fetch_watermarks (
+    country VARCHAR(2) NOT NULL,
+    category TEXT NOT NULL,   -- 'all' when no category filter is used
+    last_published_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (country, category)
+);
+
+-- Conditional-GET validators for each RSS/Atom feed
+CREATE TABLE IF NOT EXISTS rss_feeds (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    checked_at TIMESTAMP
+);
+
+-- Per-member progress for bulk archive imports (import_bulk.py)
+CREATE TABLE IF NOT EXISTS import_progress (
+    file_name TEXT NOT NULL,
+    member TEXT NOT NULL,
+    rows_loaded BIGINT NOT NULL,
+    completed_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (file_name, member)
+);
+
+-- One row per fetch/clean/analyze run, for the dashboard's Ops page
+CREATE TABLE IF NOT EXISTS pipeline_runs (
+    id SERIAL PRIMARY KEY,
+    job TEXT NOT NULL,
+    started_at TIMESTAMP NOT NULL,
+    finished_at TIMESTAMP NOT NULL,
+    stage_seconds JSONB,      -- {"fetch": 1.2, "store": 0.3, ...}
+    items_in INTEGER,
+    items_out INTEGER,
+    errors INTEGER NOT NULL DEFAULT 0,
+    error_message TEXT,
+    backlog INTEGER,          -- unanalyzed rows when the run finished
+    analyzer_version TEXT,
+    host TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_pipeline_runs_started ON pipeline_runs(started_at);
+
+-- Daily sentiment counts per country, refreshed by scripts/rollup.py
+CREATE TABLE IF NOT EXISTS news_daily_rollup (
+    day DATE NOT NULL,
+    country VARCHAR(2),
+    sentiment_label VARCHAR(8),
+    articles INTEGER NOT NULL,
+    avg_sentiment FLOAT
+);
+CREATE INDEX IF NOT EXISTS idx_rollup_day ON news_daily_rollup(day, country);
+
+-- Wake resident analyzers (analyze_sentiment.py --listen) when unscored
+-- rows arrive. Statement-level, so a 500-row batch is one notification:
+-- {"min_id": ..., "max_id": ..., "count": ...}. Needs PostgreSQL 11+.
+CREATE OR REPLACE FUNCTION notify_new_articles() RETURNS trigger AS $$
+DECLARE
+    payload TEXT;
+BEGIN
+    SELECT json_build_object('min_id', MIN(id), 'max_id', MAX(id), 'count', COUNT(*))::TEXT
+    INTO payload
+    FROM inserted
+    WHERE analyzed_at IS NULL;
+    IF payload::JSON->>'count' <> '0' THEN
+        PERFORM pg_notify('new_articles', payload);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS news_notify_new_articles ON news_core;
+CREATE TRIGGER news_notify_new_articles
+AFTER INSERT ON news_core
+REFERENCING NEW TABLE AS inserted
+FOR EACH STATEMENT EXECUTE FUNCTION notify_new_articles();
+
+-- Parquet files written by scripts/cold_archive.py, relative to
+-- data/processed/. Unless kept (written with --keep), their rows were
+-- deleted from news_core and news_daily_rollup keeps their days.
+CREATE TABLE IF NOT EXISTS news_archive (
+    path TEXT PRIMARY KEY,
+    month DATE NOT NULL,
+    country VARCHAR(2),
+    rows INTEGER NOT NULL,
+    kept BOOLEAN NOT NULL DEFAULT FALSE,
+    archived_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+ALTER TABLE news_archive ADD COLUMN IF NOT EXISTS kept BOOLEAN NOT NULL DEFAULT FALSE;
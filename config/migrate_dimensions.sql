@@ -0,0 +1,53 @@
+-- One-off migration from news.source / news.author text to the sources
+-- and authors dimension tables, for databases where news is still a
+-- table (see db_setup.sql for the order of the migrate_*.sql files).
+-- Safe to re-run.
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS sources (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS authors (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_tables
+               WHERE schemaname = current_schema() AND tablename = 'news') THEN
+        ALTER TABLE news
+            ADD COLUMN IF NOT EXISTS source_id INTEGER REFERENCES sources(id),
+            ADD COLUMN IF NOT EXISTS author_id INTEGER REFERENCES authors(id);
+        CREATE INDEX IF NOT EXISTS idx_source ON news(source_id);
+
+        IF EXISTS (SELECT 1 FROM information_schema.columns
+                   WHERE table_schema = current_schema() AND table_name = 'news'
+                   AND column_name = 'source') THEN
+            INSERT INTO sources (name)
+            SELECT DISTINCT source FROM news WHERE source IS NOT NULL
+            ON CONFLICT (name) DO NOTHING;
+            INSERT INTO authors (name)
+            SELECT DISTINCT author FROM news WHERE author IS NOT NULL
+            ON CONFLICT (name) DO NOTHING;
+
+            UPDATE news
+            SET source_id = sources.id
+            FROM sources
+            WHERE sources.name = news.source;
+            UPDATE news
+            SET author_id = authors.id
+            FROM authors
+            WHERE authors.name = news.author;
+
+            ALTER TABLE news DROP COLUMN source, DROP COLUMN author;
+        END IF;
+    END IF;
+END $$;
+
+COMMIT;
+
+-- See migrate_emotion_columns.sql: VACUUM FULL news rewrites the rows
+-- without the dropped text.
+VACUUM (ANALYZE) news;
@@ -0,0 +1,43 @@
+-- One-off migration from news.emotions JSONB to the emotion_* REAL
+-- columns, for databases where news is still a table (see db_setup.sql
+-- for the order of the migrate_*.sql files). Safe to re-run.
+BEGIN;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_tables
+               WHERE schemaname = current_schema() AND tablename = 'news') THEN
+        ALTER TABLE news
+            ADD COLUMN IF NOT EXISTS emotion_joy REAL,
+            ADD COLUMN IF NOT EXISTS emotion_anger REAL,
+            ADD COLUMN IF NOT EXISTS emotion_sadness REAL,
+            ADD COLUMN IF NOT EXISTS emotion_fear REAL,
+            ADD COLUMN IF NOT EXISTS emotion_surprise REAL,
+            ADD COLUMN IF NOT EXISTS emotion_trust REAL,
+            ADD COLUMN IF NOT EXISTS emotion_disgust REAL,
+            ADD COLUMN IF NOT EXISTS emotion_anticipation REAL;
+    END IF;
+
+    IF EXISTS (SELECT 1 FROM information_schema.columns
+               WHERE table_schema = current_schema() AND table_name = 'news'
+               AND column_name = 'emotions') THEN
+        UPDATE news
+        SET emotion_joy = (emotions->>'joy')::REAL,
+            emotion_anger = (emotions->>'anger')::REAL,
+            emotion_sadness = (emotions->>'sadness')::REAL,
+            emotion_fear = (emotions->>'fear')::REAL,
+            emotion_surprise = (emotions->>'surprise')::REAL,
+            emotion_trust = (emotions->>'trust')::REAL,
+            emotion_disgust = (emotions->>'disgust')::REAL,
+            emotion_anticipation = (emotions->>'anticipation')::REAL
+        WHERE emotions IS NOT NULL;
+        ALTER TABLE news DROP COLUMN emotions;
+    END IF;
+END $$;
+
+COMMIT;
+
+-- Clear the dead row versions left by the UPDATE. The dropped JSON bytes
+-- stay on disk until rows are rewritten; `VACUUM FULL news` does that now
+-- but holds an exclusive lock while it runs.
+VACUUM (ANALYZE) news;
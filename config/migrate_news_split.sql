@@ -0,0 +1,44 @@
+-- One-off migration that splits the news table into news_core (metadata
+-- and scores) and news_text (description, content). Run after
+-- migrate_emotion_columns.sql and migrate_dimensions.sql, then run
+-- db_setup.sql, which creates the news view over the two tables.
+-- Safe to re-run.
+BEGIN;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_tables
+               WHERE schemaname = current_schema() AND tablename = 'news') THEN
+        -- Columns added after the original schema
+        ALTER TABLE news
+            ADD COLUMN IF NOT EXISTS sentiment_subjectivity FLOAT,
+            ADD COLUMN IF NOT EXISTS analyzed_at TIMESTAMP,
+            ADD COLUMN IF NOT EXISTS content_hash CHAR(32);
+        UPDATE news SET analyzed_at = NOW() AT TIME ZONE 'UTC'
+        WHERE analyzed_at IS NULL AND sentiment_score IS NOT NULL;
+
+        -- Views and the notify trigger are recreated by db_setup.sql
+        DROP VIEW IF EXISTS news_emotions;
+        DROP TRIGGER IF EXISTS news_notify_new_articles ON news;
+
+        ALTER TABLE news RENAME TO news_core;
+        CREATE TABLE news_text (
+            id INTEGER PRIMARY KEY REFERENCES news_core(id) ON DELETE CASCADE,
+            description TEXT,
+            content TEXT
+        );
+        INSERT INTO news_text (id, description, content)
+        SELECT id, description, content
+        FROM news_core
+        WHERE description IS NOT NULL OR content IS NOT NULL;
+        ALTER TABLE news_core DROP COLUMN description, DROP COLUMN content;
+    END IF;
+END $$;
+
+COMMIT;
+
+-- Dropped columns keep their bytes until rows are rewritten, and narrow
+-- pages are the point of the split: rewrite news_core now. Holds an
+-- exclusive lock while it runs, so stop the daemon first.
+VACUUM (FULL, ANALYZE) news_core;
+VACUUM (ANALYZE) news_text;
@@ -0,0 +1,39 @@
+# dashboards/dashboard_data.py
+# Aggregations behind the Streamlit charts, kept free of streamlit so
+# they can be benchmarked (scripts/bench.py) and reused.
+import pandas as pd
+from news_schema import EMOTIONS, EMOTION_COLUMNS
+
+
+def compact_dtypes(df):
+    """Labels as categoricals and scores as float32, in place.
+
+    utils/db_handler.read_frame already loads these types; this brings
+    other frames (the Parquet archive, or the two concatenated) in line.
+    """
+    for column in df.columns:
+        if column in ('country', 'sentiment_label'):
+            df[column] = df[column].astype('category')
+        elif column == 'sentiment_score' or column in EMOTION_COLUMNS:
+            df[column] = df[column].astype('float32')
+    return df
+
+
+def sentiment_over_time(df):
+    """Article counts per day and sentiment label"""
+    published = df['published_at']
+    if not pd.api.types.is_datetime64_any_dtype(published):
+        published = pd.to_datetime(published)
+    counts = df.groupby([published.dt.normalize().rename('date'), 'sentiment_label'],
+                        observed=True).size().unstack()
+    counts.columns = counts.columns.astype(str)
+    return counts
+
+
+def emotion_means(df):
+    """Mean score per emotion as an (emotion, score) frame for the radar"""
+    # NULL (NaN) means the emotion wasn't found and is left out of the mean
+    emotions_agg = df[list(EMOTION_COLUMNS)].astype('float32').mean().reset_index()
+    emotions_agg.columns = ['emotion', 'score']
+    emotions_agg['emotion'] = EMOTIONS
+    return emotions_agg.dropna()
@@ -0,0 +1,64 @@
+# dashboards/ops_page.py
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+
+def load_runs(conn, days):
+    return pd.read_sql("""
+        SELECT job, started_at, finished_at, stage_seconds,
+               items_in, items_out, errors, error_message,
+               backlog, analyzer_version, host
+        FROM pipeline_runs
+        WHERE started_at >= NOW() AT TIME ZONE 'UTC' - %s * INTERVAL '1 day'
+        ORDER BY started_at
+    """, conn, params=[days])
+
+
+def render(conn):
+    """Backlog, throughput and latency of the scheduled jobs"""
+    st.title("Pipeline Operations")
+    days = st.sidebar.slider("Days of history", 1, 90, 14)
+    runs = load_runs(conn, days)
+    if runs.empty:
+        st.info("No pipeline runs recorded yet")
+        return
+
+    runs['duration'] = (runs['finished_at'] - runs['started_at']).dt.total_seconds()
+    runs['throughput'] = runs['items_out'] / runs['duration'].where(runs['duration'] > 0)
+
+    latest = runs.groupby('job').tail(1).set_index('job')
+    cols = st.columns(len(latest) + 1)
+    cols[0].metric("Analyzer backlog", int(runs['backlog'].dropna().iloc[-1])
+                   if runs['backlog'].notna().any() else "n/a")
+    for col, (job, row) in zip(cols[1:], latest.iterrows()):
+        col.metric(f"Last {job}", f"{row['duration']:.1f}s",
+                   f"{row['errors']} errors" if row['errors'] else None,
+                   delta_color="inverse")
+
+    st.subheader("Backlog (unanalyzed articles)")
+    st.plotly_chart(px.line(runs, x='started_at', y='backlog', color='job'),
+                    use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Throughput (items out / s)")
+        st.plotly_chart(px.line(runs, x='started_at', y='throughput', color='job'),
+                        use_container_width=True)
+    with col2:
+        st.subheader("Run duration (s)")
+        st.plotly_chart(px.line(runs, x='started_at', y='duration', color='job'),
+                        use_container_width=True)
+
+    st.subheader("Stage timings")
+    stages = pd.json_normalize(runs['stage_seconds'].tolist())
+    stages.index = runs.index
+    stages = pd.concat([runs[['job', 'started_at']], stages], axis=1)
+    job = st.selectbox("Job", sorted(runs['job'].unique()))
+    st.bar_chart(stages[stages['job'] == job].set_index('started_at')
+                 .drop(columns='job').dropna(axis=1, how='all'))
+
+    failed = runs[runs['errors'] > 0]
+    if not failed.empty:
+        st.subheader("Failed runs")
+        st.dataframe(failed[['job', 'started_at', 'error_message', 'host']])
@@ -2,73 +2,184 @@
 import streamlit as st
 import plotly.express as px
 import pandas as pd
-from db_utils import get_db_connection
-import json
+import os
+import sys
+from contextlib import closing
+from datetime import timedelta
+from cold_archive import read_archive
+from db_utils import connect
+from dashboard_data import compact_dtypes, sentiment_over_time, emotion_means
+import ops_page
+from news_schema import EMOTION_COLUMNS
+from profiling import memory_stage
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from utils.db_handler import read_frame
 
 st.set_page_config(layout="wide")
 
-# Sidebar controls
+BACKEND = os.getenv("DASHBOARD_BACKEND", "postgres")
+# Seconds a query result is shared across reruns and sessions
+CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", 300))
+
+
+# Data: cached per filter combination, so a panel rerun (or another
+# session with the same filters) doesn't touch the database
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def load_sources():
+    with closing(connect()) as conn:
+        return pd.read_sql("SELECT id, name FROM sources ORDER BY name", conn)
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def load_frame(country, source_id, start, end):
+    """Rows behind the charts from Postgres and the Parquet archive.
+
+    Only the columns the charts use (country and source are filters),
+    typed by read_frame: categorical labels, float32 emotions.
+    """
+    conditions, params = [], []
+    if country:
+        conditions.append("country = %s")
+        params.append(country)
+    if source_id is not None:
+        conditions.append("source_id = %s")
+        params.append(source_id)
+    if start:
+        conditions.append("published_at >= %s")
+        params.append(start)
+    if end:
+        conditions.append("published_at < %s")
+        params.append(end)
+    query = f"""
+        SELECT id, published_at, sentiment_label, {', '.join(EMOTION_COLUMNS)}
+        FROM news
+    """
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+
+    with memory_stage("dashboard_load"):
+        with closing(connect()) as conn:
+            df = read_frame(conn, query, params if params else None)
+        ids = df.pop("id")
+        # Months moved to Parquet by cold_archive.py, less rows archived
+        # with --keep (still in Postgres, so already in df)
+        archived = read_archive(df.columns, country=country, source_id=source_id,
+                                start=start, end=end, exclude_ids=ids.to_numpy())
+        if not archived.empty:
+            df = compact_dtypes(pd.concat([archived, df], ignore_index=True))
+    return df
+
+
+def aggregate(name, filters):
+    """(result, backend) of dashboard_data.<name>, or of analytics_db.<name>
+    when DASHBOARD_BACKEND=duckdb and the analytics file can be opened"""
+    if BACKEND == "duckdb":
+        import analytics_db
+        duck = analytics_db.open_read_only()
+        if duck is not None:
+            with closing(duck):
+                return getattr(analytics_db, name)(duck, **filters), "duckdb"
+    func = sentiment_over_time if name == "sentiment_over_time" else emotion_means
+    return func(load_frame(**filters)), "postgres"
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def sentiment_data(country, source_id, start, end):
+    return aggregate("sentiment_over_time", dict(
+        country=country, source_id=source_id, start=start, end=end))
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def emotion_data(country, source_id, start, end):
+    return aggregate("emotion_means", dict(
+        country=country, source_id=source_id, start=start, end=end))
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def top_terms(terms):
+    with closing(connect()) as conn:
+        topics_df = pd.read_sql("SELECT * FROM news_topics", conn)
+    if topics_df.empty:
+        return None
+    return topics_df.groupby('topic').apply(
+        lambda x: x.nlargest(terms, 'beta')['term'].tolist()
+    )
+
+
+def fallback_note(backend):
+    if BACKEND == "duckdb" and backend != "duckdb":
+        st.caption("Analytics database unavailable; read from Postgres")
+
+
+# Panels: each is a fragment, so its own widgets rerun only that panel
+
+@st.fragment
+def sentiment_panel(filters):
+    st.subheader("Sentiment Over Time")
+    share = st.toggle("Share of each day's articles", key="sentiment_share")
+    sentiment_counts, backend = sentiment_data(**filters)
+    if share:
+        sentiment_counts = sentiment_counts.div(sentiment_counts.sum(axis=1), axis=0)
+    st.line_chart(sentiment_counts)
+    fallback_note(backend)
+
+
+@st.fragment
+def emotion_panel(filters):
+    st.subheader("Emotion Analysis")
+    emotions_agg, backend = emotion_data(**filters)
+    if not emotions_agg.empty:
+        fig = px.line_polar(emotions_agg, r='score', theta='emotion', line_close=True)
+        st.plotly_chart(fig)
+    fallback_note(backend)
+
+
+@st.fragment
+def topics_panel():
+    st.subheader("Topic Distribution")
+    terms = st.slider("Terms per topic", 3, 15, 5, key="topic_terms")
+    terms_by_topic = top_terms(terms)
+    if terms_by_topic is not None:
+        st.write(terms_by_topic)
+
+
+page = st.sidebar.radio("Page", ["Sentiment", "Ops"])
+if page == "Ops":
+    conn = connect()
+    ops_page.render(conn)
+    conn.close()
+    st.stop()
+
+# Sidebar controls: changing a filter reruns the page, and each panel
+# then reads its cached result for the new filters
 st.sidebar.title("Filters")
 country = st.sidebar.selectbox("Country", ["All", "US", "GB", "IN", "CN", "BR"])
+sources = load_sources()
+source_ids = dict(zip(sources["name"], sources["id"]))
+source = st.sidebar.selectbox("Source", ["All"] + list(source_ids))
 date_range = st.sidebar.date_input("Date Range", [])
 
-# Connect to database
-conn = get_db_connection()
-
-# Load data
-query = """
-    SELECT published_at, sentiment_label, emotions, country 
-    FROM news
-"""
-params = []
-
-if country != "All":
-    query += " WHERE country = %s"
-    params.append(country.lower())
-
-if len(date_range) == 2:
-    if "WHERE" not in query:
-        query += " WHERE"
-    else:
-        query += " AND"
-    query += " published_at BETWEEN %s AND %s"
-    params.extend(date_range)
-
-df = pd.read_sql(query, conn, params=params if params else None)
-
-# Process emotions data
-if not df.empty and 'emotions' in df.columns:
-    emotions_df = pd.json_normalize(df['emotions'].apply(
-        lambda x: json.loads(x) if x else {}
-    ))
-    emotions_agg = emotions_df.mean().reset_index()
-    emotions_agg.columns = ['emotion', 'score']
+# Same filters for every backend; end is exclusive
+filters = dict(
+    country=country.lower() if country != "All" else None,
+    source_id=int(source_ids[source]) if source != "All" else None,
+    start=date_range[0] if len(date_range) == 2 else None,
+    end=date_range[1] + timedelta(days=1) if len(date_range) == 2 else None,
+)
 
 # Dashboard
 st.title("Global News Sentiment Dashboard")
 
 # Row 1: Sentiment Trend
-st.subheader("Sentiment Over Time")
-df['date'] = pd.to_datetime(df['published_at']).dt.date
-sentiment_counts = df.groupby(['date', 'sentiment_label']).size().unstack()
-st.line_chart(sentiment_counts)
+sentiment_panel(filters)
 
 # Row 2: Emotion and Topics
 col1, col2 = st.columns(2)
 
 with col1:
-    st.subheader("Emotion Analysis")
-    if not df.empty and 'emotions' in df.columns:
-        fig = px.line_polar(emotions_agg, r='score', theta='emotion', line_close=True)
-        st.plotly_chart(fig)
+    emotion_panel(filters)
 
 with col2:
-    st.subheader("Topic Distribution")
-    topics_df = pd.read_sql("SELECT * FROM news_topics", conn)
-    if not topics_df.empty:
-        top_terms = topics_df.groupby('topic').apply(
-            lambda x: x.nlargest(5, 'beta')['term'].tolist()
-        )
-        st.write(top_terms)
-
-conn.close()
\ No newline at end of file
+    topics_panel()
@@ -0,0 +1,186 @@
+# scripts/analytics_db.py
+# Optional analytics copy of the scored articles in an embedded DuckDB
+# file, so the dashboard's aggregations run as columnar scans without
+# touching Postgres. `sync()` copies rows analyzed since the last run;
+# the dashboard reads it when DASHBOARD_BACKEND=duckdb.
+import argparse
+import glob
+import logging
+import os
+from datetime import datetime, time, timedelta
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+
+from cold_archive import ARCHIVE_DIR, SCHEMA, UNKNOWN_COUNTRY
+from db_utils import get_db_connection
+from news_schema import EMOTIONS, EMOTION_COLUMNS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ANALYTICS_DB = os.getenv("ANALYTICS_DB", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "data", "analytics.duckdb"))
+SYNC_BATCH = int(os.getenv("ANALYTICS_SYNC_BATCH", 50_000))
+# analyzed_at is the analyzer's transaction start, so a batch committed
+# just after the last sync can carry an earlier stamp: re-read this much
+SYNC_OVERLAP = timedelta(minutes=10)
+
+# Only what the dashboard aggregates; text stays in Postgres/Parquet
+COLUMNS = ("id", "source_id", "published_at", "country", "sentiment_score",
+           "sentiment_label", *EMOTION_COLUMNS, "analyzed_at")
+ARROW_SCHEMA = pa.schema([SCHEMA.field(name) if name != "country"
+                          else pa.field("country", pa.string())
+                          for name in COLUMNS])
+
+CREATE_TABLE = f"""
+    CREATE TABLE IF NOT EXISTS news (
+        id INTEGER PRIMARY KEY,
+        source_id INTEGER,
+        published_at TIMESTAMP,
+        country VARCHAR,
+        sentiment_score DOUBLE,
+        sentiment_label VARCHAR,
+        {', '.join(f'{column} REAL' for column in EMOTION_COLUMNS)},
+        analyzed_at TIMESTAMP
+    )
+"""
+
+
+def connect(read_only=False):
+    return duckdb.connect(ANALYTICS_DB, read_only=read_only)
+
+
+def open_read_only():
+    """Read-only connection, or None if the file is missing or a sync holds it"""
+    if not os.path.exists(ANALYTICS_DB):
+        logger.warning(f"{ANALYTICS_DB} not found; run analytics_db.py first")
+        return None
+    try:
+        return connect(read_only=True)
+    except duckdb.IOException as e:
+        logger.warning(f"Analytics database unavailable: {e}")
+        return None
+
+
+def load_archive(duck):
+    """Copy the Parquet cold tier (cold_archive.py) into the news table"""
+    pattern = os.path.join(ARCHIVE_DIR, "year=*", "month=*", "country=*", "*.parquet")
+    if not glob.glob(pattern):
+        return 0
+    select = ", ".join(f"NULLIF(country, '{UNKNOWN_COUNTRY}')" if name == "country"
+                       else name for name in COLUMNS)
+    duck.execute(f"""
+        INSERT OR REPLACE INTO news ({', '.join(COLUMNS)})
+        SELECT {select}
+        FROM read_parquet(?, hive_partitioning = true)
+    """, [pattern])
+    return duck.execute("SELECT COUNT(*) FROM news").fetchone()[0]
+
+
+def sync(full=False, batch_size=SYNC_BATCH):
+    """Copy analyzed rows from Postgres; returns the number copied.
+
+    Incremental runs re-read everything analyzed since the newest
+    analyzed_at already copied (less SYNC_OVERLAP) and replace by id, so
+    re-scored articles are picked up. Rows deleted from Postgres are kept
+    (archived months stay queryable); `full` rebuilds from the Parquet
+    archive and Postgres, which also drops rows clean_data.py removed and
+    picks up `relabel`, which doesn't touch analyzed_at. An empty file is
+    always rebuilt.
+    """
+    copied = 0
+    with connect() as duck:
+        duck.execute(CREATE_TABLE)
+        duck.begin()
+        # A new (or emptied) file has no archived months yet: rebuild, as
+        # snapshot.py does, or they'd never be loaded
+        if full or duck.execute("SELECT COUNT(*) FROM news").fetchone()[0] == 0:
+            duck.execute("DELETE FROM news")
+            logger.info(f"Loaded {load_archive(duck)} archived articles")
+            since = None
+        else:
+            since = duck.execute("SELECT MAX(analyzed_at) FROM news").fetchone()[0]
+
+        query = f"""
+            SELECT {', '.join(COLUMNS)} FROM news_core
+            WHERE analyzed_at IS NOT NULL
+        """
+        params = None
+        if since is not None:
+            query += " AND analyzed_at > %s"
+            params = (since - SYNC_OVERLAP,)
+
+        with get_db_connection() as conn:
+            # Server-side cursor: a full sync streams instead of loading
+            # every row into memory
+            with conn.cursor(name="analytics_sync") as cur:
+                cur.itersize = batch_size
+                cur.execute(query, params)
+                while True:
+                    rows = cur.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    batch = pa.Table.from_pydict(
+                        {name: list(values) for name, values in zip(COLUMNS, zip(*rows))},
+                        schema=ARROW_SCHEMA)
+                    duck.register("batch", batch)
+                    duck.execute("INSERT OR REPLACE INTO news SELECT * FROM batch")
+                    duck.unregister("batch")
+                    copied += len(rows)
+            conn.rollback()
+        duck.commit()
+    logger.info(f"Synced {copied} articles to {ANALYTICS_DB}")
+    return copied
+
+
+def _where(country=None, source_id=None, start=None, end=None):
+    """WHERE clause and parameters for the dashboard filters; end is exclusive"""
+    clauses, params = [], []
+    if country:
+        clauses.append("country = ?")
+        params.append(country)
+    if source_id is not None:
+        clauses.append("source_id = ?")
+        params.append(source_id)
+    if start:
+        clauses.append("published_at >= ?")
+        params.append(datetime.combine(start, time()))
+    if end:
+        clauses.append("published_at < ?")
+        params.append(datetime.combine(end, time()))
+    return " AND ".join(clauses) or "TRUE", params
+
+
+def sentiment_over_time(duck, **filters):
+    """Same shape as dashboard_data.sentiment_over_time, aggregated in DuckDB"""
+    where, params = _where(**filters)
+    counts = duck.execute(f"""
+        SELECT CAST(published_at AS DATE) AS date, sentiment_label, COUNT(*) AS articles
+        FROM news
+        WHERE {where} AND sentiment_label IS NOT NULL
+        GROUP BY 1, 2
+    """, params).df()
+    return counts.pivot(index="date", columns="sentiment_label",
+                        values="articles").sort_index()
+
+
+def emotion_means(duck, **filters):
+    """Same shape as dashboard_data.emotion_means, aggregated in DuckDB"""
+    where, params = _where(**filters)
+    means = duck.execute(f"""
+        SELECT {', '.join(f'AVG({column})' for column in EMOTION_COLUMNS)}
+        FROM news
+        WHERE {where}
+    """, params).fetchone()
+    return pd.DataFrame({"emotion": EMOTIONS, "score": means}).dropna()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Copy analyzed articles into the DuckDB analytics file")
+    parser.add_argument("--full", action="store_true",
+                        help="rebuild from the Parquet archive and Postgres")
+    args = parser.parse_args()
+    sync(args.full)
@@ -1,34 +1,65 @@
 # scripts/analyze_sentiment.py
 import psycopg2
-from psycopg2 import extras # For JSONB support
 from textblob import TextBlob
 from dotenv import load_dotenv
 import os
-from db_utils import get_db_connection
+from db_utils import connect, get_db_connection
 import logging
 from collections import defaultdict
+import json
 import re
+import select
+import threading
+import time
+from contextlib import nullcontext
+import metrics
+from news_schema import EMOTION_COLUMNS, emotion_values
+from profiling import memory_profiled, profiled, profile_stage
+from run_ledger import record_run
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bumped whenever scoring changes, recorded with every pipeline run
+ANALYZER_VERSION = "textblob-lexicon-1"
+
+BATCH_SIZE = 100
+# Label cut-offs on TextBlob polarity. Only labels depend on these: after
+# changing them, `relabel` rewrites sentiment_label from the stored scores.
+POSITIVE_THRESHOLD = float(os.getenv("SENTIMENT_POSITIVE_THRESHOLD", 0.1))
+NEGATIVE_THRESHOLD = float(os.getenv("SENTIMENT_NEGATIVE_THRESHOLD", -0.1))
+EMOTION_ASSIGNMENTS = ", ".join(f"{column} = %s" for column in EMOTION_COLUMNS)
+# Channel the news_notify_new_articles trigger sends to (config/db_setup.sql)
+NOTIFY_CHANNEL = "new_articles"
+# Listen mode still sweeps for rows it missed (e.g. while reconnecting)
+SWEEP_INTERVAL = float(os.getenv("ANALYZE_SWEEP_INTERVAL", 300))
+
 # 1. Sentiment Analysis Function (defined first)
 
 
-def analyze_sentiment(text):
-    """TextBlob sentiment analysis"""
-    analysis = TextBlob(text)
-    polarity = analysis.sentiment.polarity
+def label_sentiment(polarity, positive=None, negative=None):
+    """Map a polarity onto positive/negative/neutral"""
+    positive = POSITIVE_THRESHOLD if positive is None else positive
+    negative = NEGATIVE_THRESHOLD if negative is None else negative
+    if polarity > positive:
+        return 'positive'
+    elif polarity < negative:
+        return 'negative'
+    return 'neutral'
 
-    if polarity > 0.1:
-        sentiment = 'positive'
-    elif polarity < -0.1:
-        sentiment = 'negative'
-    else:
-        sentiment = 'neutral'
 
-    return polarity, sentiment
+@profiled("analyze_sentiment")
+def score_sentiment(text):
+    """TextBlob (polarity, subjectivity)"""
+    analysis = TextBlob(text).sentiment
+    return analysis.polarity, analysis.subjectivity
+
+
+def analyze_sentiment(text):
+    """TextBlob sentiment analysis"""
+    polarity, _ = score_sentiment(text)
+    return polarity, label_sentiment(polarity)
 
 
 # 2. Comprehensive Emotion Lexicon (Direct Dictionary)
@@ -87,6 +118,7 @@ def normalize_word(word):
 # 4. Emotion Analysis
 
 
+@profiled("analyze_emotions")
 def analyze_emotions(text):
     """Robust emotion analysis with direct dictionary matching"""
     if not isinstance(text, str) or not text.strip():
@@ -114,103 +146,170 @@ def analyze_emotions(text):
 # 5. Article Processing
 
 
-def process_articles():
-    """Process articles with verification logging"""
+def article_text(title, description, content):
+    """Concatenate the text fields that get scored"""
+    return " ".join(filter(None, [
+        str(title) if title else "",
+        str(description) if description else "",
+        str(content) if content else ""
+    ]))
+
+
+def score_article(article):
+    """Score an in-memory article dict in place (used by pipeline.py)"""
+    text = article_text(article.get("title"), article.get("description"),
+                        article.get("content"))
+    if text.strip():
+        polarity, subjectivity = score_sentiment(text)
+        article["sentiment_score"] = polarity
+        article["sentiment_subjectivity"] = subjectivity
+        article["sentiment_label"] = label_sentiment(polarity)
+        article["emotions"] = analyze_emotions(text)
+        metrics.ARTICLES_SCORED.inc()
+    return article
+
+
+@memory_profiled("process_articles")
+def process_articles(run=None, min_id=None, max_id=None):
+    """Process articles with verification logging
+
+    min_id/max_id restrict the batch to an id range from a notification.
+    Rows are locked with SKIP LOCKED, so a listener and a scheduled run
+    never score the same batch. Returns the rows taken from the backlog,
+    including those marked without scoring (no text), so 0 means it is
+    empty.
+    """
+    def stage(name):
+        return run.stage(name) if run else nullcontext()
+
     try:
         with get_db_connection() as conn:
             with conn.cursor() as cur:
-                # Verify table structure
-                cur.execute("""
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE table_name = 'news' 
-                    AND column_name = 'emotions'
-                """)
-                if not cur.fetchone():
-                    cur.execute("ALTER TABLE news ADD COLUMN emotions JSONB")
-                    conn.commit()
-                    logger.info("Added emotions column to table")
-
                 # Get test articles
-                cur.execute("""
-                    SELECT id, title, description, content 
-                    FROM news 
-                    WHERE sentiment_score IS NULL 
-                    OR emotions IS NULL
-                    LIMIT 100  -- Process in batches
-                """)
-                articles = cur.fetchall()
+                with stage("select"), metrics.DB_ROUNDTRIP.labels("select").time():
+                    cur.execute("""
+                        SELECT c.id, c.title, t.description, t.content 
+                        FROM news_core AS c
+                        LEFT JOIN news_text AS t ON t.id = c.id
+                        WHERE c.analyzed_at IS NULL
+                        AND c.id BETWEEN COALESCE(%s, 0) AND COALESCE(%s, 2147483647)
+                        LIMIT %s  -- Process in batches
+                        FOR UPDATE OF c SKIP LOCKED
+                    """, (min_id, max_id, BATCH_SIZE))
+                    articles = cur.fetchall()
+                if run:
+                    run.items_in = len(articles)
 
                 if not articles:
                     logger.info("No unprocessed articles found")
                     return 0
 
                 processed_count = 0
-                for article in articles:
-                    article_id, title, description, content = article
-                    text = " ".join(filter(None, [
-                        str(title) if title else "",
-                        str(description) if description else "",
-                        str(content) if content else ""
-                    ]))
-
-                    if not text.strip():
-                        continue
-
-                    # Run analyses
-                    polarity, sentiment = analyze_sentiment(text)
-                    emotions = analyze_emotions(text)
-
-                    # Debug logging
-                    logger.debug(f"\n--- Article {article_id} ---")
-                    logger.debug(f"Text: {text[:200]}...")
-                    logger.debug(f"Sentiment: {sentiment} ({polarity:.2f})")
-                    logger.debug(f"Emotions: {emotions}")
-
-                    # Update database
-                    cur.execute("""
-                        UPDATE news 
-                        SET sentiment_score = %s,
-                            sentiment_label = %s,
-                            emotions = %s
-                        WHERE id = %s
-                    """, (
-                        polarity,
-                        sentiment,
-                        extras.Json(emotions) if emotions else None,
-                        article_id
-                    ))
-                    processed_count += 1
-
-                conn.commit()
+                with profile_stage("update_loop"):
+                    for article in articles:
+                        article_id, title, description, content = article
+                        text = article_text(title, description, content)
+
+                        if not text.strip():
+                            # Nothing to score; mark it so it leaves the backlog
+                            cur.execute("UPDATE news_core SET analyzed_at = NOW() AT TIME ZONE 'UTC' "
+                                        "WHERE id = %s", (article_id,))
+                            continue
+
+                        # Run analyses
+                        with stage("score"):
+                            polarity, subjectivity = score_sentiment(text)
+                            sentiment = label_sentiment(polarity)
+                            emotions = analyze_emotions(text)
+
+                        # Debug logging
+                        logger.debug(f"\n--- Article {article_id} ---")
+                        logger.debug(f"Text: {text[:200]}...")
+                        logger.debug(f"Sentiment: {sentiment} ({polarity:.2f})")
+                        logger.debug(f"Emotions: {emotions}")
+
+                        # Update database
+                        with stage("update"), metrics.DB_ROUNDTRIP.labels("update").time():
+                            cur.execute(f"""
+                                UPDATE news_core 
+                                SET sentiment_score = %s,
+                                    sentiment_subjectivity = %s,
+                                    sentiment_label = %s,
+                                    {EMOTION_ASSIGNMENTS},
+                                    analyzed_at = NOW() AT TIME ZONE 'UTC'
+                                WHERE id = %s
+                            """, (
+                                polarity,
+                                subjectivity,
+                                sentiment,
+                                *emotion_values(emotions),
+                                article_id
+                            ))
+                        processed_count += 1
+                        metrics.ARTICLES_SCORED.inc()
+
+                with stage("update"), metrics.DB_ROUNDTRIP.labels("commit").time():
+                    conn.commit()
                 logger.info(
-                    f"Successfully processed {processed_count} articles")
-                return processed_count
+                    f"Successfully processed {len(articles)} articles "
+                    f"({processed_count} scored)")
+                return len(articles)
 
     except Exception as e:
         logger.error(f"Processing error: {str(e)}")
         raise
 
 
-# Main execution
-if __name__ == "__main__":
-    load_dotenv('D:\GitHub\global-news\config\.env')
-    logger.info("Starting analysis with direct lexicon...")
-    
-    # Updated verification tests
+def relabel(positive=None, negative=None):
+    """Recompute sentiment_label from the stored polarity in one UPDATE.
+
+    Only rows whose label actually changes are written, so re-running with
+    the same thresholds is a read-only scan. Archived Parquet files (and
+    the rollup of their months) are relabelled too. Returns the rows
+    relabelled.
+    """
+    positive = POSITIVE_THRESHOLD if positive is None else positive
+    negative = NEGATIVE_THRESHOLD if negative is None else negative
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            label = """CASE
+                WHEN sentiment_score > %(positive)s THEN 'positive'
+                WHEN sentiment_score < %(negative)s THEN 'negative'
+                ELSE 'neutral'
+            END"""
+            cur.execute(f"""
+                UPDATE news_core
+                SET sentiment_label = {label}
+                WHERE sentiment_score IS NOT NULL
+                AND sentiment_label IS DISTINCT FROM {label}
+            """, {"positive": positive, "negative": negative})
+            changed = cur.rowcount
+            cur.execute("SELECT EXISTS (SELECT 1 FROM news_archive)")
+            archived = cur.fetchone()[0]
+        conn.commit()
+    logger.info(f"Relabelled {changed} articles (positive > {positive}, "
+                f"negative < {negative})")
+    if archived:
+        from cold_archive import relabel_archive
+        changed += relabel_archive(positive, negative)
+    return changed
+
+
+def selftest():
+    """Check analyze_emotions against known phrases"""
     test_cases = [
         ("I love this wonderful happy day", {'joy': 1.0, 'trust': 0.3333}),
         ("This angry furious rage makes me mad", {'anger': 1.0}),
         ("The fearful anxious worried crowd", {'fear': 1.0}),
         ("Empty text", None)
     ]
-    
+
     for text, expected in test_cases:
         result = analyze_emotions(text)
         logger.info(f"\nTest: {text}")
         logger.info(f"Expected: {expected}")
         logger.info(f"Actual: {result}")
-        
+
         if expected is None:
             assert result is None, f"Expected None but got {result}"
         else:
@@ -219,7 +318,117 @@ if __name__ == "__main__":
                 assert emotion in result, f"Missing emotion {emotion}"
                 assert abs(result[emotion] - expected[emotion]) < 0.2, \
                     f"Score {result[emotion]} differs too much from {expected[emotion]}"
-    
-    # Process articles
-    processed_count = process_articles()
+    logger.info(f"All {len(test_cases)} self-tests passed")
+
+
+def drain(run=None, min_id=None, max_id=None, stop=None):
+    """process_articles until the range (or the whole backlog) is empty"""
+    total = 0
+    while not (stop and stop.is_set()):
+        processed = process_articles(run, min_id, max_id)
+        total += processed
+        if processed == 0:
+            break
+    return total
+
+
+def _wait_for_notifications(conn, timeout):
+    """Block until notifications arrive; returns the merged id range or None"""
+    if select.select([conn], [], [], timeout) == ([], [], []):
+        return None
+    conn.poll()
+    ranges = []
+    while conn.notifies:
+        notify = conn.notifies.pop(0)
+        try:
+            payload = json.loads(notify.payload)
+            ranges.append((payload["min_id"], payload["max_id"]))
+        except (ValueError, KeyError):
+            # Hand-sent NOTIFY without a range: scan the whole backlog
+            ranges.append((None, None))
+    if any(low is None for low, _ in ranges):
+        return (None, None)
+    return (min(low for low, _ in ranges), max(high for _, high in ranges))
+
+
+def listen(stop=None, sweep_interval=SWEEP_INTERVAL):
+    """Resident analyzer: LISTEN on new_articles and score each insert's
+    id range as it commits, instead of polling on a schedule.
+
+    Notifications that arrive during a batch are merged into the next one,
+    so a burst of inserts turns into a few micro-batches. Every
+    sweep_interval seconds (and after reconnecting) the whole backlog is
+    drained too, covering rows inserted while nobody was listening.
+    """
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        try:
+            conn = connect()
+        except psycopg2.Error as e:
+            logger.error(f"Listener cannot connect: {e}")
+            stop.wait(10)
+            continue
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {NOTIFY_CHANNEL}")
+            logger.info(f"Listening on {NOTIFY_CHANNEL}")
+
+            pending = (None, None)   # start with a full sweep
+            next_sweep = time.monotonic() + sweep_interval
+            while not stop.is_set():
+                if pending is None and time.monotonic() >= next_sweep:
+                    pending = (None, None)
+                if pending is not None:
+                    with record_run("analyze", ANALYZER_VERSION) as run:
+                        run.items_out = drain(run, *pending, stop=stop)
+                    if pending == (None, None):
+                        next_sweep = time.monotonic() + sweep_interval
+                    pending = None
+                # Wake at least once a second to notice stop
+                pending = _wait_for_notifications(conn, 1.0)
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            logger.error(f"Listener connection lost: {e}")
+            stop.wait(1)
+        except Exception:
+            # Anything else from drain (a query error, a bad row) must not
+            # end the thread: log it, reconnect and resume with a sweep.
+            # Back off longer so a persistent error doesn't spin.
+            logger.exception("Listener batch failed; reconnecting")
+            stop.wait(10)
+        finally:
+            conn.close()
+
+
+def run_analysis():
+    """Score one batch, recorded in pipeline_runs"""
+    with record_run("analyze", ANALYZER_VERSION) as run:
+        processed_count = process_articles(run)
+        run.items_out = processed_count
     logger.info(f"Completed. Processed {processed_count} articles")
+    return processed_count
+
+
+# Main execution
+if __name__ == "__main__":
+    import argparse
+    import signal
+
+    parser = argparse.ArgumentParser(description="Score unanalyzed articles")
+    parser.add_argument("--listen", action="store_true",
+                        help="stay resident and score new rows as they are inserted")
+    args = parser.parse_args()
+
+    load_dotenv('D:\GitHub\global-news\config\.env')
+    logger.info("Starting analysis with direct lexicon...")
+
+    # Self-tests run separately: python scripts/globalnews.py selftest
+    metrics.start_metrics_server()
+    if args.listen:
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        signal.signal(signal.SIGINT, lambda *_: stop.set())
+        listen(stop)
+    else:
+        run_analysis()
+    metrics.write_metrics_textfile()
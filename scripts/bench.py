@@ -0,0 +1,336 @@
+# scripts/bench.py
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "dashboards"))
+
+BENCH_DIR = os.path.join(ROOT, "data", "bench")
+
+# Neutral filler so emotion words appear at a realistic rate
+FILLER = (
+    "the a of to in and on for with said government officials report week "
+    "country city people year minister police market company new after "
+    "talks election court health power water school state president vote "
+    "plan deal data local global team season "
+).split()
+INFLECTIONS = ("", "s", "ed", "ing", "ly")
+
+
+# 1. Synthetic corpus
+
+
+def generate_corpus(size=2000, words=(30, 120), emotion_rate=0.08,
+                    duplicate_rate=0.15, countries=None, seed=42):
+    """NewsAPI-shaped articles with vocabulary drawn from emotion_dict.
+
+    `duplicate_rate` of the articles reuse an earlier URL, the way
+    repeated fetches of the same headlines do.
+    """
+    from analyze_sentiment import emotion_dict
+
+    rng = random.Random(seed)
+    countries = countries or {"us": 0.4, "gb": 0.3, "in": 0.15, "cn": 0.1, "br": 0.05}
+    codes, weights = zip(*countries.items())
+    lexicon = list(emotion_dict)
+    start = datetime(2025, 1, 1)
+
+    def sentence(n):
+        out = []
+        for _ in range(n):
+            if rng.random() < emotion_rate:
+                out.append(rng.choice(lexicon) + rng.choice(INFLECTIONS))
+            else:
+                out.append(rng.choice(FILLER))
+        return " ".join(out)
+
+    articles = []
+    for i in range(size):
+        if articles and rng.random() < duplicate_rate:
+            url = rng.choice(articles)["url"]
+        else:
+            url = f"https://example.com/{seed}/{i}"
+        articles.append({
+            "source": {"name": f"Source {rng.randint(1, 300)}"},
+            "author": f"Author {rng.randint(1, 2000)}",
+            "title": sentence(rng.randint(6, 14)).capitalize(),
+            "description": sentence(rng.randint(15, 30)),
+            "url": url,
+            "publishedAt": (start + timedelta(minutes=rng.randint(0, 60 * 24 * 90))
+                            ).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "content": sentence(rng.randint(*words)),
+            "country": rng.choices(codes, weights)[0],
+        })
+    return articles
+
+
+# 2. Timed cases
+
+
+def peak_memory(func):
+    """Peak traced allocation (MiB) during one call"""
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        func()
+        return round((tracemalloc.get_traced_memory()[1] - baseline) / 2**20, 2)
+    finally:
+        if not already_tracing:
+            tracemalloc.stop()
+
+
+def timed(func, repeat):
+    """Best and median wall time of `repeat` calls"""
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - started)
+    return {"seconds": min(runs), "median": statistics.median(runs)}
+
+
+def bench_cases(articles, with_db=False, only=None):
+    """name -> (callable, item count)"""
+    from analyze_sentiment import (analyze_emotions, analyze_sentiment,
+                                   article_text, normalize_word)
+    from news_schema import EMOTION_COLUMNS, emotion_values
+
+    texts = [article_text(a["title"], a["description"], a["content"]) for a in articles]
+    tokens = [word for text in texts for word in text.split()]
+
+    def dashboard_frame():
+        # Shaped like the dashboard's query result; labels are drawn at
+        # random so building the frame doesn't pay for TextBlob
+        import pandas as pd
+        rng = random.Random(0)
+        scored = []
+        for article, text in zip(articles, texts):
+            label = rng.choice(("positive", "neutral", "negative"))
+            scored.append((article["publishedAt"], label,
+                           *emotion_values(analyze_emotions(text)),
+                           article["country"]))
+        from dashboard_data import compact_dtypes
+        df = pd.DataFrame(scored, columns=["published_at", "sentiment_label",
+                                           *EMOTION_COLUMNS, "country"])
+        # Typed the way utils/db_handler.read_frame loads it
+        df["published_at"] = pd.to_datetime(df["published_at"], utc=True).dt.tz_localize(None)
+        return compact_dtypes(df)
+
+    cases = {
+        "normalize_word": (lambda: [normalize_word(w) for w in tokens], len(tokens)),
+        "analyze_emotions": (lambda: [analyze_emotions(t) for t in texts], len(texts)),
+        "analyze_sentiment": (lambda: [analyze_sentiment(t) for t in texts], len(texts)),
+    }
+
+    from fetch_news import article_row
+    source_ids = {name: i for i, name in enumerate({a["source"]["name"] for a in articles})}
+    author_ids = {name: i for i, name in enumerate({a["author"] for a in articles})}
+    cases["article_row"] = (
+        lambda: [article_row(a, source_ids, author_ids) for a in articles], len(articles))
+
+    if with_db:
+        cases["save_to_db"] = (lambda: _bench_insert(articles), len(articles))
+        cases.update(_read_cases())
+
+    if not only or "dashboard_aggregation" in only:
+        from dashboard_data import emotion_means, sentiment_over_time
+        df = dashboard_frame()
+        cases["dashboard_aggregation"] = (
+            lambda: (sentiment_over_time(df.copy()), emotion_means(df)), len(df))
+
+    # Needs duckdb, so only on request: --only dashboard_aggregation:duckdb
+    if only and "dashboard_aggregation:duckdb" in only:
+        import duckdb
+        import analytics_db
+        duck = duckdb.connect()
+        frame = dashboard_frame()
+        duck.register("frame", frame)
+        duck.execute("CREATE TABLE news AS SELECT * FROM frame")
+        cases["dashboard_aggregation:duckdb"] = (
+            lambda: (analytics_db.sentiment_over_time(duck),
+                     analytics_db.emotion_means(duck)), len(frame))
+    return cases
+
+
+def startup_cases():
+    """Wall time of `globalnews <command> --help` and of importing each
+    command's module, both in a fresh interpreter"""
+    from globalnews import COMMAND_MODULES
+
+    scripts_dir = os.path.dirname(os.path.abspath(__file__))
+    cli = os.path.join(scripts_dir, "globalnews.py")
+
+    def spawn(argv):
+        return lambda: subprocess.run([sys.executable] + argv, cwd=scripts_dir,
+                                      stdout=subprocess.DEVNULL, check=True)
+
+    cases = {"startup:python": (spawn(["-c", "pass"]), 1)}
+    for command, module in COMMAND_MODULES.items():
+        cases[f"startup:{command}"] = (spawn([cli, command, "--help"]), 1)
+    for module in sorted(set(COMMAND_MODULES.values())):
+        cases[f"import:{module}"] = (spawn(["-c", f"import {module}"]), 1)
+    return cases
+
+
+def _bench_insert(articles):
+    """Run the real insert path against session-local copies of the tables"""
+    from db_utils import get_db_connection
+    from fetch_news import insert_articles, update_watermarks
+
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            # Temp tables shadow the real ones for unqualified names
+            cur.execute("CREATE TEMP TABLE news_core (LIKE public.news_core INCLUDING ALL)")
+            cur.execute("CREATE TEMP TABLE news_text (LIKE public.news_text INCLUDING ALL)")
+            cur.execute("CREATE TEMP TABLE sources (LIKE public.sources INCLUDING ALL)")
+            cur.execute("CREATE TEMP TABLE authors (LIKE public.authors INCLUDING ALL)")
+            cur.execute("CREATE TEMP TABLE fetch_watermarks "
+                        "(LIKE public.fetch_watermarks INCLUDING ALL)")
+            insert_articles(cur, articles)
+            update_watermarks(cur, articles)
+        conn.rollback()
+
+
+def _read_cases(limit=100_000):
+    """pd.read_sql against utils/db_handler.read_frame on the same rows"""
+    import pandas as pd
+    from db_utils import connect
+    from news_schema import EMOTION_COLUMNS
+    sys.path.insert(0, ROOT)
+    from utils.db_handler import read_frame
+
+    query = f"""
+        SELECT id, published_at, country, sentiment_score, sentiment_label,
+               {', '.join(EMOTION_COLUMNS)}
+        FROM news_core ORDER BY id DESC LIMIT {limit}
+    """
+    conn = connect()
+    rows = len(pd.read_sql(query, conn))
+    return {
+        "read_sql": (lambda: pd.read_sql(query, conn), rows),
+        "read_frame": (lambda: read_frame(conn, query), rows),
+    }
+
+
+# 3. Baseline comparison
+
+
+def compare(results, baseline, threshold):
+    """Names of cases slower than baseline by more than `threshold`"""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            continue
+        change = result["seconds"] / before["seconds"] - 1
+        result["change"] = round(change, 4)
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def run(args):
+    if args.startup:
+        cases = startup_cases()
+    else:
+        articles = generate_corpus(args.size, duplicate_rate=args.duplicate_rate,
+                                   emotion_rate=args.emotion_rate,
+                                   countries=args.countries, seed=args.seed)
+        cases = bench_cases(articles, with_db=args.db, only=args.only)
+
+    results = {}
+    for name, (func, items) in cases.items():
+        if args.only and name not in args.only:
+            continue
+        result = timed(func, args.repeat)
+        result["items"] = items
+        result["per_item_us"] = round(result["seconds"] / max(items, 1) * 1e6, 3)
+        if args.memory or args.memory_budget:
+            # Separate pass so tracing overhead doesn't skew the timings
+            result["peak_mb"] = peak_memory(func)
+        results[name] = result
+        print(f"{name:<24}{result['seconds']:>10.4f}s  {result['per_item_us']:>10.3f} us/item"
+              + (f"  {result['peak_mb']:>8.2f} MiB" if "peak_mb" in result else ""))
+
+    report = {
+        "timestamp": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "params": {"size": args.size, "duplicate_rate": args.duplicate_rate,
+                   "emotion_rate": args.emotion_rate, "countries": args.countries,
+                   "seed": args.seed, "repeat": args.repeat},
+        "results": results,
+    }
+
+    from profiling import peak_rss_mb
+    report["peak_rss_mb"] = peak_rss_mb()
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"Slower than baseline by over {args.threshold:.0%}: {', '.join(regressions)}")
+    if args.memory_budget:
+        over = [name for name, result in results.items()
+                if result["peak_mb"] > args.memory_budget]
+        if over:
+            print(f"Over the {args.memory_budget} MiB memory budget: {', '.join(over)}")
+            regressions.extend(over)
+
+    output = args.output or os.path.join(
+        BENCH_DIR, f"bench-{datetime.utcnow():%Y%m%dT%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if regressions:
+        print(f"Failed: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+def parse_countries(value):
+    """'us=0.5,gb=0.5' -> {'us': 0.5, 'gb': 0.5}"""
+    return {code: float(weight) for code, weight in
+            (item.split("=") for item in value.split(","))}
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Benchmark the hot paths")
+    parser.add_argument("--size", type=int, default=2000, help="articles in the corpus")
+    parser.add_argument("--duplicate-rate", type=float, default=0.15)
+    parser.add_argument("--emotion-rate", type=float, default=0.08,
+                        help="share of words drawn from emotion_dict")
+    parser.add_argument("--countries", type=parse_countries, default=None,
+                        help="country mix, e.g. us=0.5,gb=0.3,in=0.2")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", help="run only these cases")
+    parser.add_argument("--startup", action="store_true",
+                        help="time CLI start-up and module imports per command instead")
+    parser.add_argument("--db", action="store_true",
+                        help="also time the save_to_db insert path (rolled back)")
+    parser.add_argument("--output", help="results JSON (default data/bench/)")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="allowed slowdown vs baseline, e.g. 0.10 = 10%%")
+    parser.add_argument("--memory", action="store_true",
+                        help="also record peak traced memory per case")
+    parser.add_argument("--memory-budget", type=float, default=None,
+                        help="fail if any case's peak exceeds this many MiB")
+    return parser
+
+
+if __name__ == "__main__":
+    sys.exit(run(build_parser().parse_args()))
@@ -0,0 +1,83 @@
+# scripts/clean_data.py
+import re
+import logging
+from db_utils import get_db_connection
+from run_ledger import record_run
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# NewsAPI replaces takedowns with this placeholder in every text field
+REMOVED = "[Removed]"
+# ...and truncates content with a "[+1234 chars]" marker
+TRUNCATION = re.compile(r"\s*\[\+\d+ chars\]$")
+WHITESPACE = re.compile(r"\s+")
+
+
+def clean_text(value):
+    """Collapse whitespace; empty strings become None"""
+    if not isinstance(value, str):
+        return None
+    value = WHITESPACE.sub(" ", value).strip()
+    return value or None
+
+
+def clean_article(article):
+    """Normalise one NewsAPI-shaped article, or None if it should be dropped"""
+    title = clean_text(article.get("title"))
+    url = clean_text(article.get("url"))
+    if not title or not url or title == REMOVED:
+        return None
+
+    content = clean_text(article.get("content"))
+    if content:
+        content = TRUNCATION.sub("", content) or None
+
+    article["title"] = title
+    article["url"] = url
+    article["description"] = clean_text(article.get("description"))
+    article["content"] = content
+    article["author"] = clean_text(article.get("author"))
+    return article
+
+
+def clean_articles(articles):
+    """Clean a batch and drop repeated URLs"""
+    seen = set()
+    cleaned = []
+    for article in articles:
+        article = clean_article(article)
+        if article and article["url"] not in seen:
+            seen.add(article["url"])
+            cleaned.append(article)
+    return cleaned
+
+
+def clean_db():
+    """Apply the same rules to rows already stored"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            # news_text rows go with them (ON DELETE CASCADE)
+            cur.execute("DELETE FROM news_core WHERE title = %s", (REMOVED,))
+            removed = cur.rowcount
+            cur.execute(r"""
+                UPDATE news_text
+                SET content = NULLIF(regexp_replace(content, '\s*\[\+\d+ chars\]$', ''), '')
+                WHERE content ~ '\[\+\d+ chars\]$'
+            """)
+            trimmed = cur.rowcount
+        conn.commit()
+    logger.info(f"Removed {removed} placeholder articles, trimmed {trimmed} contents")
+    return removed, trimmed
+
+
+def run_clean():
+    """clean_db, recorded in pipeline_runs"""
+    with record_run("clean") as run:
+        with run.stage("clean"):
+            removed, trimmed = clean_db()
+        run.items_out = removed + trimmed
+
+
+if __name__ == "__main__":
+    run_clean()
@@ -0,0 +1,332 @@
+# scripts/cold_archive.py
+# Cold tier for old articles. Months older than the retention window are
+# written to Parquet under
+#   data/processed/year=YYYY/month=M/country=CC/part-<min id>-<max id>.parquet
+# (hive partitioning, so readers prune by year/month/country from the
+# path and by published_at from row-group statistics) and then deleted
+# from Postgres. news_daily_rollup keeps the archived days, and
+# read_archive() lets the dashboard union them back in.
+import argparse
+import logging
+import os
+from datetime import date, datetime, time, timezone
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from psycopg2 import extras
+
+from db_utils import get_db_connection
+from news_schema import EMOTION_COLUMNS
+from rollup import add_rows, refresh_range
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "..", "data", "processed")
+RETENTION_MONTHS = int(os.getenv("ARCHIVE_RETENTION_MONTHS", 12))
+# Partition name for rows without a country
+UNKNOWN_COUNTRY = "unknown"
+
+# Every column of the news view is kept, so deleting the rows loses
+# nothing; readers select the columns they need. country is the partition.
+SCHEMA = pa.schema([
+    ("id", pa.int32()),
+    ("source_id", pa.int32()),
+    ("source", pa.string()),
+    ("author_id", pa.int32()),
+    ("author", pa.string()),
+    ("title", pa.string()),
+    ("description", pa.string()),
+    ("url", pa.string()),
+    ("published_at", pa.timestamp("us")),
+    ("content", pa.string()),
+    ("sentiment_score", pa.float64()),
+    ("sentiment_subjectivity", pa.float64()),
+    ("sentiment_label", pa.string()),
+    *[(column, pa.float32()) for column in EMOTION_COLUMNS],
+    ("analyzed_at", pa.timestamp("us")),
+    ("content_hash", pa.string()),
+])
+PARTITIONING = ds.partitioning(
+    pa.schema([("year", pa.int16()), ("month", pa.int8()), ("country", pa.string())]),
+    flavor="hive")
+
+
+def month_start(day, months_back=0):
+    """First day of the month `months_back` months before `day`'s month"""
+    index = day.year * 12 + day.month - 1 - months_back
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_dir(month, country):
+    return os.path.join(ARCHIVE_DIR, f"year={month.year}", f"month={month.month}",
+                        f"country={country or UNKNOWN_COUNTRY}")
+
+
+def _write_table(table, path):
+    """Write a Parquet file atomically"""
+    directory, name = os.path.split(path)
+    # Dot-prefixed, so dataset discovery skips a half-written file
+    tmp_path = os.path.join(directory, f".{name}.tmp")
+    pq.write_table(table, tmp_path, compression="zstd", write_statistics=True,
+                   row_group_size=100_000)
+    os.replace(tmp_path, path)
+
+
+def write_partition(table, month, country):
+    """Write one partition file atomically; returns its path.
+
+    The name comes from the id range, so re-running after a crash
+    (before the rows were deleted) overwrites the same file, while rows
+    that arrive for the month later get a file of their own.
+    """
+    ids = table.column("id")
+    directory = partition_dir(month, country)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"part-{pc.min(ids).as_py()}-{pc.max(ids).as_py()}.parquet")
+    _write_table(table, path)
+    return path
+
+
+def _drop_stale_files(cur, month, country):
+    """Remove the partition's files whose rows are still in news_core.
+
+    Those are files written with --keep and files left by a run that
+    crashed before committing. Their rows are about to be written again,
+    so removing them first keeps every id in exactly one file.
+    """
+    directory = partition_dir(month, country)
+    if not os.path.isdir(directory):
+        return
+    cur.execute("""
+        SELECT path FROM news_archive
+        WHERE month = %s AND country IS NOT DISTINCT FROM %s AND NOT kept
+    """, (month, country))
+    settled = {row[0] for row in cur.fetchall()}
+    for name in os.listdir(directory):
+        path = os.path.relpath(os.path.join(directory, name), ARCHIVE_DIR)
+        if name.endswith(".parquet") and path not in settled:
+            os.remove(os.path.join(directory, name))
+            cur.execute("DELETE FROM news_archive WHERE path = %s", (path,))
+
+
+def archive_month(conn, month, keep=False):
+    """Archive the analyzed rows published in `month`; delete them unless `keep`.
+
+    Until a month's rows are first deleted its rollup is rebuilt from
+    news_core. After that, news_core only holds rows that arrived late,
+    and they are added to the existing rollup as they're deleted. Each
+    month is one transaction.
+    """
+    until = month_start(month, -1)
+    archived = 0
+    with conn.cursor() as cur:
+        cur.execute("SELECT EXISTS (SELECT 1 FROM news_archive WHERE month = %s AND NOT kept)",
+                    (month,))
+        settled = cur.fetchone()[0]
+        if not settled:
+            # The rollup must be complete for these days before their rows go
+            refresh_range(cur, month, until)
+
+        cur.execute("""
+            SELECT DISTINCT country FROM news_core
+            WHERE published_at >= %s AND published_at < %s
+            AND analyzed_at IS NOT NULL
+        """, (month, until))
+        countries = [row[0] for row in cur.fetchall()]
+
+        for country in countries:
+            cur.execute(f"""
+                SELECT {', '.join(SCHEMA.names)}
+                FROM news
+                WHERE published_at >= %s AND published_at < %s
+                AND country IS NOT DISTINCT FROM %s
+                AND analyzed_at IS NOT NULL
+                ORDER BY published_at
+            """, (month, until, country))
+            rows = cur.fetchall()
+            if not rows:
+                continue
+            table = pa.Table.from_pydict(
+                {name: list(values) for name, values in zip(SCHEMA.names, zip(*rows))},
+                schema=SCHEMA)
+            _drop_stale_files(cur, month, country)
+            path = write_partition(table, month, country)
+
+            # The file is in place: record it and drop the rows together
+            cur.execute("""
+                INSERT INTO news_archive (path, month, country, rows, kept)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (path) DO UPDATE
+                SET rows = EXCLUDED.rows, kept = EXCLUDED.kept, archived_at = NOW()
+            """, (os.path.relpath(path, ARCHIVE_DIR), month, country, len(rows), keep))
+            if not keep:
+                ids = [row[0] for row in rows]
+                if settled:
+                    add_rows(cur, ids)
+                cur.execute("DELETE FROM news_core WHERE id = ANY(%s)", (ids,))
+            archived += len(rows)
+            logger.info(f"Archived {len(rows)} articles for {month:%Y-%m} "
+                        f"{country or UNKNOWN_COUNTRY} to {path}")
+        conn.commit()
+    return archived
+
+
+def archive(retention_months=None, keep=False):
+    """Move every month older than the retention window to Parquet"""
+    if retention_months is None:
+        retention_months = RETENTION_MONTHS
+    # published_at is stored in UTC
+    cutoff = month_start(datetime.now(timezone.utc).date(), retention_months)
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT DISTINCT date_trunc('month', published_at)::date
+                FROM news_core
+                WHERE published_at < %s AND analyzed_at IS NOT NULL
+                ORDER BY 1
+            """, (cutoff,))
+            months = [row[0] for row in cur.fetchall()]
+        conn.rollback()
+
+        archived = 0
+        for month in months:
+            archived += archive_month(conn, month, keep)
+    logger.info(f"Archived {archived} articles from {len(months)} months before {cutoff}")
+    return archived
+
+
+def _labels(scores, labels, positive, negative):
+    """analyze_sentiment.label_sentiment over a column; rows without a
+    score keep their label, as in relabel()"""
+    computed = pc.if_else(pc.greater(scores, positive), "positive",
+                          pc.if_else(pc.less(scores, negative), "negative", "neutral"))
+    return pc.if_else(pc.is_null(scores), labels, computed)
+
+
+def relabel_archive(positive, negative):
+    """Apply new label thresholds to the archived files; returns rows relabelled.
+
+    Months whose rows were deleted from news_core have their rollup
+    rebuilt from the (relabelled) files, since Postgres can no longer
+    recompute those days.
+    """
+    changed = 0
+    # (day, country, label) -> [articles, score sum, scored articles]
+    groups = {}
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT path, month, country, kept FROM news_archive ORDER BY path")
+            files = cur.fetchall()
+            settled = sorted({month for _, month, _, kept in files if not kept})
+
+            for path, month, country, kept in files:
+                full_path = os.path.join(ARCHIVE_DIR, path)
+                if not os.path.exists(full_path):
+                    logger.warning(f"{path} is listed in news_archive but missing")
+                    continue
+                # ParquetFile, not read_table: the partition columns stay
+                # in the path
+                table = pq.ParquetFile(full_path).read()
+                scores = table.column("sentiment_score")
+                old = table.column("sentiment_label")
+                new = _labels(scores, old, positive, negative)
+                differs = pc.and_(pc.is_valid(scores), pc.or_(
+                    pc.is_null(old), pc.fill_null(pc.not_equal(old, new), False)))
+                count = pc.sum(differs).as_py() or 0
+                if count:
+                    table = table.set_column(table.schema.get_field_index("sentiment_label"),
+                                             "sentiment_label", new)
+                    _write_table(table, full_path)
+                    changed += count
+
+                if kept:
+                    continue
+                daily = pa.table({
+                    "day": pc.cast(table.column("published_at"), pa.date32()),
+                    "label": table.column("sentiment_label"),
+                    "id": table.column("id"),
+                    "score": scores,
+                }).group_by(["day", "label"]).aggregate([
+                    ("id", "count"),
+                    ("score", "sum"),
+                    ("score", "count"),
+                ])
+                for day, label, articles, total, scored in zip(
+                        *(daily.column(name).to_pylist() for name in (
+                            "day", "label", "id_count", "score_sum", "score_count"))):
+                    group = groups.setdefault((day, country, label), [0, 0.0, 0])
+                    group[0] += articles
+                    group[1] += total or 0.0
+                    group[2] += scored
+
+            for month in settled:
+                cur.execute("DELETE FROM news_daily_rollup WHERE day >= %s AND day < %s",
+                            (month, month_start(month, -1)))
+            extras.execute_values(cur, """
+                INSERT INTO news_daily_rollup (
+                    day, country, sentiment_label, articles, avg_sentiment
+                ) VALUES %s
+            """, [(day, country, label, articles, total / scored if scored else None)
+                  for (day, country, label), (articles, total, scored) in groups.items()])
+        conn.commit()
+    logger.info(f"Relabelled {changed} archived articles; rebuilt the rollup "
+                f"for {len(settled)} archived months")
+    return changed
+
+
+def archive_dataset():
+    """The Parquet files as a pyarrow dataset, or None when nothing is archived"""
+    if not os.path.isdir(ARCHIVE_DIR) or not any(
+            name.startswith("year=") for name in os.listdir(ARCHIVE_DIR)):
+        return None
+    # export_news.py writes news_<date>.csv into the same directory
+    return ds.dataset(ARCHIVE_DIR, format="parquet", partitioning=PARTITIONING,
+                      ignore_prefixes=[".", "_", "news_"])
+
+
+def read_archive(columns, country=None, source_id=None, start=None, end=None,
+                 exclude_ids=None):
+    """Archived rows as a DataFrame (empty when nothing is archived).
+
+    Filters prune partitions by path and row groups by their statistics,
+    and only `columns` are read from disk. Pass the ids already read from
+    Postgres as `exclude_ids`: rows archived with --keep are in both.
+    """
+    columns = list(columns)
+    dataset = archive_dataset()
+    if dataset is None:
+        import pandas as pd
+        return pd.DataFrame(columns=columns)
+    conditions = []
+    if country:
+        conditions.append(ds.field("country") == country)
+    if source_id is not None:
+        conditions.append(ds.field("source_id") == source_id)
+    if start:
+        conditions.append(ds.field("year") >= start.year)
+        conditions.append(ds.field("published_at") >= datetime.combine(start, time()))
+    if end:
+        conditions.append(ds.field("year") <= end.year)
+        conditions.append(ds.field("published_at") < datetime.combine(end, time()))
+    if exclude_ids is not None and len(exclude_ids):
+        conditions.append(~ds.field("id").isin(pa.array(exclude_ids, pa.int32())))
+    condition = None
+    for part in conditions:
+        condition = part if condition is None else condition & part
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Archive months older than the retention window to Parquet")
+    parser.add_argument("--months", type=int, default=RETENTION_MONTHS,
+                        help="months of articles to keep in Postgres")
+    parser.add_argument("--keep", action="store_true",
+                        help="write the Parquet files but leave the rows in Postgres")
+    args = parser.parse_args()
+    archive(args.months, args.keep)
@@ -0,0 +1,172 @@
+# scripts/daemon.py
+import argparse
+import logging
+import os
+import random
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+import db_utils
+import metrics
+from analyze_sentiment import ANALYZER_VERSION, analyze_sentiment, listen, process_articles
+from clean_data import clean_db
+from fetch_news import fetch_news, save_to_db
+from rollup import refresh_rollup
+from run_ledger import record_run
+from spool import Spool
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Seconds between runs; override with DAEMON_<JOB>_INTERVAL
+DEFAULT_INTERVALS = {
+    "fetch": 3600,
+    "analyze": 120,
+    "rollup": 900,
+    "clean": 86400,
+    "sync": 600,
+}
+# sync (analytics_db.py) needs duckdb, so it only runs when asked for
+DEFAULT_JOBS = ["fetch", "analyze", "rollup", "clean"]
+# Each wait is stretched or shrunk by up to this fraction
+JITTER = float(os.getenv("DAEMON_JITTER", 0.1))
+# process_articles works in batches of 100; stop draining after this long
+ANALYZE_BUDGET = float(os.getenv("DAEMON_ANALYZE_BUDGET", 60))
+
+
+def job_intervals():
+    return {job: float(os.getenv(f"DAEMON_{job.upper()}_INTERVAL", default))
+            for job, default in DEFAULT_INTERVALS.items()}
+
+
+@contextmanager
+def advisory_lock(name):
+    """Postgres session advisory lock; yields False if another process holds it"""
+    with db_utils.get_db_connection() as conn:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (name,))
+            acquired = cur.fetchone()[0]
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    cur.execute("SELECT pg_advisory_unlock(hashtext(%s))", (name,))
+
+
+class Daemon:
+    """Runs fetch/analyze/rollup/clean on intervals in one warm process"""
+
+    def __init__(self, intervals, countries, listen=False):
+        self.intervals = intervals
+        self.countries = countries
+        self.listen = listen
+        self.stop = threading.Event()
+        self.spool = Spool(writer=save_to_db)
+        self.listener = None
+
+    def run_fetch(self, run):
+        with run.stage("fetch"):
+            articles = fetch_news(self.countries)
+        run.items_in = len(articles)
+        # The spool's flusher keeps running between fetches
+        self.spool.append(articles)
+        self.spool.seal()
+        run.items_out = len(articles)
+
+    def run_analyze(self, run):
+        deadline = time.monotonic() + ANALYZE_BUDGET
+        run.items_out = 0
+        while not self.stop.is_set() and time.monotonic() < deadline:
+            processed = process_articles(run)
+            run.items_out += processed
+            if processed == 0:
+                break
+
+    def run_rollup(self, run):
+        with run.stage("rollup"):
+            run.items_out = refresh_rollup()
+
+    def run_clean(self, run):
+        with run.stage("clean"):
+            removed, trimmed = clean_db()
+        run.items_out = removed + trimmed
+
+    def run_sync(self, run):
+        from analytics_db import sync
+        with run.stage("sync"):
+            run.items_out = sync()
+
+    def run_job(self, job):
+        with advisory_lock(f"globalnews:{job}") as acquired:
+            if not acquired:
+                logger.info(f"Skipping {job}: already running elsewhere")
+                return
+            version = ANALYZER_VERSION if job == "analyze" else None
+            with record_run(job, version) as run:
+                getattr(self, f"run_{job}")(run)
+
+    def next_delay(self, job):
+        return self.intervals[job] * random.uniform(1 - JITTER, 1 + JITTER)
+
+    def warm_up(self):
+        """Pay the one-off costs before the first scheduled run"""
+        db_utils.init_pool(1, int(os.getenv("DAEMON_POOL_SIZE", 4)))
+        analyze_sentiment("warm up the lexicon")
+        self.spool.start_flusher()
+        if self.listen:
+            # Scores rows as they are inserted; replaces the analyze interval
+            self.listener = threading.Thread(target=listen, args=(self.stop,),
+                                             name="analyze-listener", daemon=True)
+            self.listener.start()
+
+    def serve(self):
+        self.warm_up()
+        # Spread the first runs out a little so they don't all fire at once
+        now = time.monotonic()
+        due = {job: now + random.uniform(0, 5) for job in self.intervals}
+        logger.info(f"Daemon started: {self.intervals}")
+
+        while not self.stop.is_set():
+            job = min(due, key=due.get)
+            if self.stop.wait(max(0.0, due[job] - time.monotonic())):
+                break
+            try:
+                self.run_job(job)
+            except Exception as e:
+                logger.error(f"{job} failed: {e}")
+            due[job] = time.monotonic() + self.next_delay(job)
+            metrics.write_metrics_textfile()
+
+        logger.info("Shutting down")
+        if self.listener is not None:
+            self.listener.join(timeout=float(os.getenv("SPOOL_FLUSH_TIMEOUT", 30)))
+        self.spool.close(timeout=float(os.getenv("SPOOL_FLUSH_TIMEOUT", 30)))
+        db_utils.close_pool()
+
+    def shutdown(self, signum=None, frame=None):
+        """Finish the running job, then exit"""
+        self.stop.set()
+
+
+def run_daemon(countries=["us", "gb"], jobs=DEFAULT_JOBS, listen=False):
+    intervals = {job: seconds for job, seconds in job_intervals().items()
+                 if job in jobs and not (listen and job == "analyze")}
+    daemon = Daemon(intervals, countries, listen)
+    signal.signal(signal.SIGTERM, daemon.shutdown)
+    signal.signal(signal.SIGINT, daemon.shutdown)
+    metrics.start_metrics_server()
+    daemon.serve()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the pipeline on a schedule")
+    parser.add_argument("--countries", nargs="+", default=["us", "gb"])
+    parser.add_argument("--jobs", nargs="+", choices=list(DEFAULT_INTERVALS),
+                        default=DEFAULT_JOBS)
+    parser.add_argument("--listen", action="store_true",
+                        help="score new rows on NOTIFY instead of the analyze interval")
+    args = parser.parse_args()
+    run_daemon(args.countries, args.jobs, args.listen)
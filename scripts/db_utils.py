@@ -1,3 +1,5 @@
+import csv
+import io
 import psycopg2
 from dotenv import load_dotenv
 import os
@@ -6,16 +8,71 @@ from contextlib import contextmanager
 load_dotenv('D:\GitHub\global-news\config\.env')
 
 
-@contextmanager
-def get_db_connection():
-    conn = psycopg2.connect(
+# Set by init_pool() in long-running processes (daemon.py)
+_pool = None
+
+
+def _connect_kwargs():
+    return dict(
         host=os.getenv("DB_HOST"),
         database=os.getenv("DB_NAME"),
         user=os.getenv("DB_USER"),
         password=os.getenv("DB_PASSWORD"),
-        port=os.getenv("DB_PORT")
+        port=os.getenv("DB_PORT"),
+        connect_timeout=int(os.getenv("DB_CONNECT_TIMEOUT", 10))
     )
+
+
+def connect():
+    """Open a new connection; the caller closes it"""
+    return psycopg2.connect(**_connect_kwargs())
+
+
+def init_pool(minconn=1, maxconn=5):
+    """Serve get_db_connection() from a pool of warm connections"""
+    global _pool
+    from psycopg2.pool import ThreadedConnectionPool
+    _pool = ThreadedConnectionPool(minconn, maxconn, **_connect_kwargs())
+
+
+def close_pool():
+    global _pool
+    if _pool is not None:
+        _pool.closeall()
+        _pool = None
+
+
+@contextmanager
+def get_db_connection():
+    if _pool is None:
+        conn = connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+        return
+
+    conn = _pool.getconn()
     try:
         yield conn
     finally:
-        conn.close()
+        # Same contract as close(): uncommitted work is discarded. If the
+        # server went away the rollback fails: drop the connection instead,
+        # but always give the slot back and let the body's error through.
+        broken = bool(conn.closed)
+        if not broken:
+            try:
+                conn.rollback()
+                conn.autocommit = False
+            except psycopg2.Error:
+                broken = True
+        _pool.putconn(conn, close=broken)
+
+
+def copy_rows(cur, table, columns, rows):
+    """Load rows into table with COPY FROM STDIN (CSV)"""
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    buf.seek(0)
+    cur.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
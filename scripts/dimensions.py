@@ -0,0 +1,51 @@
+# scripts/dimensions.py
+# Dictionary encoding for repeated strings on news: source and author
+# names live once in `sources` / `authors` and news stores integer ids.
+# Each process keeps a name -> id cache, so a warm writer resolves a
+# batch without touching the database; misses are resolved in bulk.
+import threading
+
+
+class Dimension:
+    def __init__(self, table):
+        self.table = table
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    def ids(self, cur, names):
+        """name -> id for every non-empty name, inserting unknown ones.
+
+        Call once per transaction. Ids created here are not cached: if the
+        transaction rolls back they never existed. They are picked up
+        (already committed) the next time they come through.
+        """
+        names = {name for name in names if name}
+        with self._lock:
+            found = {name: self._ids[name] for name in names if name in self._ids}
+        # Sorted, so concurrent writers take the unique-index locks in order
+        missing = sorted(names - found.keys())
+        if not missing:
+            return found
+
+        cur.execute(f"""
+            INSERT INTO {self.table} (name)
+            SELECT unnest(%s::TEXT[])
+            ON CONFLICT (name) DO NOTHING
+            RETURNING name, id
+        """, (missing,))
+        created = dict(cur.fetchall())
+        found.update(created)
+
+        existing = [name for name in missing if name not in created]
+        if existing:
+            cur.execute(f"SELECT name, id FROM {self.table} WHERE name = ANY(%s)",
+                        (existing,))
+            committed = dict(cur.fetchall())
+            found.update(committed)
+            with self._lock:
+                self._ids.update(committed)
+        return found
+
+
+SOURCES = Dimension("sources")
+AUTHORS = Dimension("authors")
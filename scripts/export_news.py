@@ -0,0 +1,58 @@
+# scripts/export_news.py
+import argparse
+import logging
+import os
+from datetime import date
+
+from db_utils import get_db_connection
+from news_schema import EMOTION_COLUMNS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PROCESSED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..", "data", "processed")
+EXPORT_COLUMNS = ("id", "source", "author", "title", "url", "published_at",
+                  "country", "sentiment_score", "sentiment_subjectivity",
+                  "sentiment_label") + EMOTION_COLUMNS
+
+
+def export_csv(path=None, since=None, until=None, country=None):
+    """Stream scored articles to CSV with COPY ... TO STDOUT"""
+    path = path or os.path.join(PROCESSED_DIR, f"news_{date.today():%Y%m%d}.csv")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    conditions = ["analyzed_at IS NOT NULL"]
+    params = []
+    if since:
+        conditions.append("published_at >= %s")
+        params.append(since)
+    if until:
+        conditions.append("published_at < %s")
+        params.append(until)
+    if country:
+        conditions.append("country = %s")
+        params.append(country.lower())
+
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            query = cur.mogrify(f"""
+                SELECT {', '.join(EXPORT_COLUMNS)}
+                FROM news
+                WHERE {' AND '.join(conditions)}
+                ORDER BY published_at
+            """, params).decode()
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                cur.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)", f)
+    logger.info(f"Exported to {path}")
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export scored articles to CSV")
+    parser.add_argument("--output")
+    parser.add_argument("--since", type=date.fromisoformat)
+    parser.add_argument("--until", type=date.fromisoformat)
+    parser.add_argument("--country")
+    args = parser.parse_args()
+    export_csv(args.output, args.since, args.until, args.country)
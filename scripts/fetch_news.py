@@ -1,57 +1,331 @@
 # scripts/fetch_news.py
+import hashlib
+import json
+import logging
 import requests
+import time
 from datetime import datetime
+import psycopg2
+from psycopg2 import extras
 from db_utils import get_db_connection
+from dimensions import AUTHORS, SOURCES
+from clean_data import TRUNCATION, clean_text
+from news_schema import EMOTION_COLUMNS, emotion_values
+from raw_archive import archive_response
+from spool import Spool
+import metrics
+from profiling import memory_profiled, profiled
+from run_ledger import record_run
 from dotenv import load_dotenv
 import os
 
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
 load_dotenv('../config/.env')
 API_KEY = os.getenv("NEWSAPI_KEY")
 
+# Shared so repeated fetches in one process (daemon.py) reuse connections
+session = requests.Session()
+
+# Key used in fetch_watermarks when no category filter is applied
+ALL_CATEGORIES = "all"
+# Last watermarks read from the database, for when it's unreachable
+WATERMARK_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               "..", "data", "watermarks.json")
+
+
+def parse_published_at(value):
+    """Parse NewsAPI's publishedAt timestamp"""
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ")
+
+
+def load_watermarks():
+    """Newest stored published_at per (country, category).
+
+    Falls back to the copy saved by the last successful load when the
+    database can't be reached, so fetching (and spooling) never waits on
+    it; without a copy, nothing is filtered and the content hash catches
+    the repeats.
+    """
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT country, category, last_published_at
+                    FROM fetch_watermarks
+                """)
+                watermarks = {(country, category): last_published_at
+                              for country, category, last_published_at in cur.fetchall()}
+    # InterfaceError: a pooled connection (daemon.py) the server dropped
+    except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+        logger.warning(f"Using cached watermarks, database unavailable: {e}")
+        try:
+            with open(WATERMARK_CACHE, encoding="utf-8") as f:
+                return {tuple(key.split("/", 1)): datetime.fromisoformat(value)
+                        for key, value in json.load(f).items()}
+        except (OSError, ValueError):
+            return {}
+
+    os.makedirs(os.path.dirname(WATERMARK_CACHE), exist_ok=True)
+    tmp_path = f"{WATERMARK_CACHE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({f"{country}/{category}": published.isoformat()
+                   for (country, category), published in watermarks.items()}, f)
+    os.replace(tmp_path, WATERMARK_CACHE)
+    return watermarks
+
+
+@memory_profiled("fetch_news")
+@profiled("fetch_news")
+def fetch_news(countries=["us", "gb"], categories=[None], watermarks=None):
+    """Fetch top headlines, flagging items older than each watermark.
+
+    top-headlines has no `from` parameter, so the filtering happens in
+    memory. Older items are kept with `stale` set rather than dropped:
+    one may be a revision of a stored article (same url and publishedAt,
+    new text), and only the insert path can tell, so insert_articles()
+    keeps a stale item only when its url is stored with a different
+    content hash. Pass `watermarks={}` to treat everything as new.
+    """
+    if watermarks is None:
+        watermarks = load_watermarks()
 
-def fetch_news(countries=["us", "gb"]):
     all_articles = []
     for country in countries:
-        params = {
-            "country": country,
-            "apiKey": API_KEY,
-            "pageSize": 100
-        }
-        response = requests.get(
-            "https://newsapi.org/v2/top-headlines", params=params)
-        if response.ok:
-            articles = response.json().get("articles", [])
-            for article in articles:
+        for category in categories:
+            key = category or ALL_CATEGORIES
+            params = {
+                "country": country,
+                "apiKey": API_KEY,
+                "pageSize": 100
+            }
+            if category:
+                params["category"] = category
+            started = time.perf_counter()
+            response = session.get(
+                "https://newsapi.org/v2/top-headlines", params=params)
+            metrics.HTTP_LATENCY.labels(country).observe(time.perf_counter() - started)
+            metrics.HTTP_REQUESTS.labels(country, response.status_code).inc()
+            if not response.ok:
+                continue
+
+            payload = response.json()
+            archive_response(payload, country, key)
+
+            watermark = watermarks.get((country, key))
+            for article in payload.get("articles", []):
+                # >= so items sharing the watermark's second aren't flagged;
+                # those few repeats are still caught by the content hash
+                if watermark and parse_published_at(article["publishedAt"]) < watermark:
+                    article["stale"] = True
+                else:
+                    metrics.ARTICLES_FETCHED.labels(country).inc()
                 article["country"] = country
-            all_articles.extend(articles)
+                article["category"] = key
+                all_articles.append(article)
     return all_articles
 
 
+def update_watermarks(cur, articles):
+    """Advance fetch_watermarks to the newest published_at seen per key"""
+    newest = {}
+    for article in articles:
+        key = (article["country"], article.get("category", ALL_CATEGORIES))
+        published = parse_published_at(article["publishedAt"])
+        if key not in newest or published > newest[key]:
+            newest[key] = published
+
+    for (country, category), published in newest.items():
+        cur.execute("""
+            INSERT INTO fetch_watermarks (country, category, last_published_at)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (country, category) DO UPDATE
+            SET last_published_at = GREATEST(
+                fetch_watermarks.last_published_at,
+                EXCLUDED.last_published_at)
+            """, (country, category, published))
+
+
+def content_hash(article):
+    """MD5 of the scored text, normalised the way clean_data.py cleans it.
+
+    Whitespace and NewsAPI's "[+N chars]" marker don't count as changes, so
+    the raw and the already-cleaned (pipeline.py) form of an article agree.
+    """
+    content = clean_text(article.get("content"))
+    if content:
+        content = TRUNCATION.sub("", content)
+    text = "\x1f".join(clean_text(value) or "" for value in
+                       (article.get("title"), article.get("description"), content))
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+
+def article_row(article, source_ids, author_ids):
+    """Map a NewsAPI-shaped article onto the news_core columns.
+
+    Articles scored in memory (pipeline.py) carry their sentiment along,
+    so they never need a second UPDATE round trip. source_ids/author_ids
+    come from dimensions.Dimension.ids().
+    """
+    scored = "sentiment_label" in article
+    return (
+        source_ids.get(article["source"]["name"]),
+        author_ids.get(article.get("author")),
+        article["title"],
+        article["url"],
+        parse_published_at(article["publishedAt"]),
+        article["country"],
+        article.get("sentiment_score"),
+        article.get("sentiment_subjectivity"),
+        article.get("sentiment_label"),
+        *emotion_values(article.get("emotions")),
+        datetime.utcnow() if scored else None,
+        content_hash(article)
+    )
+
+
+EMOTION_UPDATES = ", ".join(f"{column} = EXCLUDED.{column}" for column in EMOTION_COLUMNS)
+
+
+def fill_missing_hashes(cur, urls):
+    """Hash stored rows that predate content_hash, from their stored text.
+
+    Without a hash, the first refetch of such a row would look like a
+    revision and clear its analysis even when nothing changed.
+    """
+    cur.execute("""
+        SELECT id, title, description, content FROM news
+        WHERE url = ANY(%s) AND content_hash IS NULL
+        """, (list(urls),))
+    rows = cur.fetchall()
+    if rows:
+        extras.execute_values(cur, """
+            UPDATE news_core SET content_hash = v.hash
+            FROM (VALUES %s) AS v (id, hash)
+            WHERE news_core.id = v.id
+            """, [(row_id, content_hash({"title": title, "description": description,
+                                         "content": content}))
+                  for row_id, title, description, content in rows])
+
+
+def drop_unrevised(cur, articles):
+    """Drop stale articles (see fetch_news) unless they revise a stored url"""
+    stale = {article["url"]: article for article in articles if article.get("stale")}
+    if not stale:
+        return articles
+    cur.execute("SELECT url, content_hash FROM news_core WHERE url = ANY(%s)",
+                (list(stale),))
+    revised = {url for url, stored_hash in cur.fetchall()
+               if stored_hash != content_hash(stale[url])}
+    return [article for article in articles
+            if not article.get("stale") or article["url"] in revised]
+
+
+def insert_articles(cur, articles):
+    """Upsert in pages; returns (id, inserted) for every row written.
+
+    An existing url is only rewritten when its content hash changed (and
+    the incoming version is not older); its analysis is replaced by the
+    incoming scores, or cleared so the analyzer picks it up again.
+    Unchanged articles cost no write at all, in news_core or news_text.
+    """
+    fill_missing_hashes(cur, {article["url"] for article in articles})
+    # One statement can't update the same row twice: keep the last version
+    latest = {article["url"]: article for article in drop_unrevised(cur, articles)}
+    if not latest:
+        return []
+    source_ids = SOURCES.ids(cur, (a["source"]["name"] for a in latest.values()))
+    author_ids = AUTHORS.ids(cur, (a.get("author") for a in latest.values()))
+    written = extras.execute_values(cur, f"""
+        INSERT INTO news_core (
+            source_id, author_id, title, url, published_at, country,
+            sentiment_score, sentiment_subjectivity, sentiment_label,
+            {', '.join(EMOTION_COLUMNS)}, analyzed_at, content_hash
+        ) VALUES %s
+        ON CONFLICT (url) DO UPDATE
+        SET source_id = EXCLUDED.source_id,
+            author_id = EXCLUDED.author_id,
+            title = EXCLUDED.title,
+            published_at = EXCLUDED.published_at,
+            sentiment_score = EXCLUDED.sentiment_score,
+            sentiment_subjectivity = EXCLUDED.sentiment_subjectivity,
+            sentiment_label = EXCLUDED.sentiment_label,
+            {EMOTION_UPDATES},
+            analyzed_at = EXCLUDED.analyzed_at,
+            content_hash = EXCLUDED.content_hash
+        WHERE news_core.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+        AND (news_core.published_at IS NULL
+             OR EXCLUDED.published_at >= news_core.published_at)
+        RETURNING id, url, (xmax = 0) AS inserted
+        """, [article_row(article, source_ids, author_ids) for article in latest.values()],
+        page_size=500, fetch=True)
+
+    extras.execute_values(cur, """
+        INSERT INTO news_text (id, description, content)
+        VALUES %s
+        ON CONFLICT (id) DO UPDATE
+        SET description = EXCLUDED.description,
+            content = EXCLUDED.content
+        """, [(row_id, latest[url].get("description"), latest[url].get("content"))
+              for row_id, url, _ in written],
+        page_size=500)
+    return [(row_id, inserted) for row_id, _, inserted in written]
+
+
+@memory_profiled("save_to_db")
+@profiled("save_to_db")
 def save_to_db(articles):
+    """Bulk upsert articles; returns how many were new"""
+    if not articles:
+        return 0
     with get_db_connection() as conn:
         with conn.cursor() as cur:
-            for article in articles:
-                cur.execute("""
-                    INSERT INTO news (
-                        source, author, title, description, url, 
-                        published_at, content, country
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (url) DO NOTHING
-                    """, (
-                    article["source"]["name"],
-                    article.get("author"),
-                    article["title"],
-                    article.get("description"),
-                    article["url"],
-                    datetime.strptime(
-                        article["publishedAt"], "%Y-%m-%dT%H:%M:%SZ"),
-                    article.get("content"),
-                    article["country"]
-                ))
-        conn.commit()
+            with metrics.DB_ROUNDTRIP.labels("insert").time():
+                written = insert_articles(cur, articles)
+            inserted = sum(1 for _, new in written if new)
+            updated = [row_id for row_id, new in written if not new]
+            if updated:
+                # The insert trigger only sees new rows; wake listeners for
+                # the rewritten ones too (delivered on commit)
+                cur.execute("SELECT pg_notify('new_articles', %s)", (json.dumps({
+                    "min_id": min(updated), "max_id": max(updated),
+                    "count": len(updated)}),))
+            update_watermarks(cur, articles)
+        with metrics.DB_ROUNDTRIP.labels("commit").time():
+            conn.commit()
+    metrics.ROWS_INSERTED.inc(inserted)
+    metrics.ROWS_UPDATED.inc(len(updated))
+    metrics.ROWS_SKIPPED.inc(len(articles) - len(written))
+    return inserted
+
+
+def run_fetch(countries=["us", "gb"], categories=[None]):
+    """Fetch, spool and flush one round, recorded in pipeline_runs"""
+    with record_run("fetch") as run:
+        with run.stage("fetch"):
+            articles = fetch_news(countries, categories)
+        run.items_in = len(articles)
+        run.items_out = 0
+
+        def write(batch):
+            inserted = save_to_db(batch)
+            run.items_out += inserted
+            return inserted
+
+        # Spool first so a slow or unreachable database never costs us the batch
+        with run.stage("store"):
+            spool = Spool(writer=write)
+            spool.append(articles)
+            spool.seal()
+            spool.start_flusher()
+            spool.close(timeout=float(os.getenv("SPOOL_FLUSH_TIMEOUT", 30)))
+    print(f"Processed {len(articles)} articles "
+          f"({len(spool.pending_segments())} spool segments pending)")
+    return len(articles)
 
 
 if __name__ == "__main__":
-    articles = fetch_news()
-    save_to_db(articles)
-    print(f"Processed {len(articles)} articles")
+    metrics.start_metrics_server()
+    run_fetch()
+    metrics.write_metrics_textfile()
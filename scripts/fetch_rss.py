@@ -0,0 +1,206 @@
+# scripts/fetch_rss.py
+import argparse
+import csv
+import logging
+import os
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from db_utils import get_db_connection
+from fetch_news import save_to_db
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FEEDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "..", "config", "rss_feeds.csv")
+MAX_WORKERS = 32
+TIMEOUT = 20
+
+# RSS 2.0 <item>, RSS 1.0 <item> and Atom <entry>, compared by local name
+ENTRY_TAGS = {"item", "entry"}
+
+
+def local_name(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def load_feeds(path=FEEDS_FILE):
+    """Read (url, country) pairs from the feeds CSV"""
+    with open(path, newline="") as f:
+        return [(row["url"], row["country"].lower()) for row in csv.DictReader(f)]
+
+
+def load_feed_state():
+    """ETag / Last-Modified validators from the previous run"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT url, etag, last_modified FROM rss_feeds")
+            return {url: (etag, last_modified)
+                    for url, etag, last_modified in cur.fetchall()}
+
+
+def save_feed_state(state):
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            for url, (etag, last_modified) in state.items():
+                cur.execute("""
+                    INSERT INTO rss_feeds (url, etag, last_modified, checked_at)
+                    VALUES (%s, %s, %s, NOW())
+                    ON CONFLICT (url) DO UPDATE
+                    SET etag = EXCLUDED.etag,
+                        last_modified = EXCLUDED.last_modified,
+                        checked_at = EXCLUDED.checked_at
+                    """, (url, etag, last_modified))
+        conn.commit()
+
+
+def parse_entry_date(value):
+    """RFC 822 (RSS) or ISO 8601 (Atom) to NewsAPI's publishedAt format"""
+    value = value.strip()
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def entry_to_article(entry, feed_title, country):
+    """Map an <item>/<entry> element onto the NewsAPI article shape"""
+    fields = {}
+    link = None
+    for child in entry:
+        name = local_name(child.tag)
+        if name == "link":
+            # Atom puts the URL in href; prefer rel="alternate" (the default)
+            href = child.get("href")
+            if href and child.get("rel", "alternate") == "alternate":
+                link = href
+            elif child.text and child.text.strip():
+                link = child.text.strip()
+        elif name == "author":
+            # Atom nests <name>, RSS uses plain text
+            author_name = next((c.text for c in child if local_name(c.tag) == "name"), None)
+            fields["author"] = author_name or child.text
+        elif child.text and name not in fields:
+            fields[name] = child.text.strip()
+
+    if not link or "title" not in fields:
+        return None
+
+    published = None
+    for name in ("pubDate", "published", "updated", "date"):
+        if name in fields:
+            published = parse_entry_date(fields[name])
+            if published:
+                break
+
+    return {
+        "source": {"name": feed_title},
+        "author": fields.get("author") or fields.get("creator"),
+        "title": fields["title"],
+        "description": fields.get("description") or fields.get("summary"),
+        "url": link,
+        "publishedAt": published or datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "content": fields.get("encoded") or fields.get("content"),
+        "country": country,
+        "category": "rss"
+    }
+
+
+def parse_feed(stream, country, fallback_title):
+    """Stream entries out of an RSS/Atom document with iterparse.
+
+    Each entry is cleared once mapped, so memory stays flat no matter how
+    long the feed is.
+    """
+    articles = []
+    feed_title = None
+    depth = 0
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        name = local_name(elem.tag)
+        if event == "start":
+            if name in ENTRY_TAGS:
+                depth += 1
+            continue
+        if name in ENTRY_TAGS:
+            depth -= 1
+            article = entry_to_article(elem, feed_title or fallback_title, country)
+            if article:
+                articles.append(article)
+            elem.clear()
+        elif name == "title" and depth == 0 and feed_title is None:
+            feed_title = (elem.text or "").strip() or None
+    return articles
+
+
+def fetch_feed(session, url, country, validators):
+    """Conditional GET of one feed; returns (articles, new validators)"""
+    etag, last_modified = validators or (None, None)
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    try:
+        with session.get(url, headers=headers, stream=True, timeout=TIMEOUT) as response:
+            if response.status_code == 304:
+                return [], (etag, last_modified)
+            response.raise_for_status()
+            response.raw.decode_content = True
+            articles = parse_feed(response.raw, country, fallback_title=url)
+            return articles, (response.headers.get("ETag"),
+                              response.headers.get("Last-Modified"))
+    except (requests.RequestException, ET.ParseError) as e:
+        logger.warning(f"Failed to fetch {url}: {e}")
+        return [], validators
+
+
+def fetch_rss(feeds, state, max_workers=MAX_WORKERS):
+    """Fetch all feeds concurrently; returns (articles, updated state)"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    all_articles = []
+    new_state = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(fetch_feed, session, url, country, state.get(url)): url
+            for url, country in feeds
+        }
+        for future, url in futures.items():
+            articles, validators = future.result()
+            all_articles.extend(articles)
+            if validators:
+                new_state[url] = validators
+    return all_articles, new_state
+
+
+def run_rss(feeds_file=FEEDS_FILE, workers=MAX_WORKERS):
+    feeds = load_feeds(feeds_file)
+    articles, state = fetch_rss(feeds, load_feed_state(), workers)
+    inserted = save_to_db(articles)
+    save_feed_state(state)
+    print(f"Processed {len(articles)} articles from {len(feeds)} feeds ({inserted} new)")
+    return inserted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch RSS/Atom feeds into news")
+    parser.add_argument("--feeds", default=FEEDS_FILE,
+                        help="CSV with url,country columns")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+    run_rss(args.feeds, args.workers)
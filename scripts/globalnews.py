@@ -0,0 +1,269 @@
+# scripts/globalnews.py
+# Single entry point for the pipeline:
+#   python scripts/globalnews.py <command> [options]
+# Only the standard library is imported up front; each command imports
+# the modules it needs (psycopg2, textblob, requests, ...) when it runs,
+# so `--help` and cheap commands start instantly.
+import argparse
+import sys
+from datetime import date
+
+# Module each command imports, used by `bench --startup`
+COMMAND_MODULES = {
+    "fetch": "fetch_news",
+    "rss": "fetch_rss",
+    "pipeline": "pipeline",
+    "analyze": "analyze_sentiment",
+    "relabel": "analyze_sentiment",
+    "clean": "clean_data",
+    "rollup": "rollup",
+    "archive": "cold_archive",
+    "sync": "analytics_db",
+    "snapshot": "snapshot",
+    "export": "export_news",
+    "replay": "raw_archive",
+    "import": "import_bulk",
+    "spool": "spool",
+    "daemon": "daemon",
+    "bench": "bench",
+    "selftest": "analyze_sentiment",
+}
+
+
+def with_metrics(func):
+    """Serve/write Prometheus metrics around a command (see metrics.py)"""
+    def wrapper(args):
+        import metrics
+        metrics.start_metrics_server()
+        try:
+            return func(args)
+        finally:
+            metrics.write_metrics_textfile()
+    return wrapper
+
+
+@with_metrics
+def cmd_fetch(args):
+    from fetch_news import run_fetch
+    run_fetch(args.countries, args.categories or [None])
+
+
+@with_metrics
+def cmd_rss(args):
+    from fetch_rss import FEEDS_FILE, run_rss
+    run_rss(args.feeds or FEEDS_FILE, args.workers)
+
+
+@with_metrics
+def cmd_pipeline(args):
+    from pipeline import run_pipeline_job
+    run_pipeline_job(args.countries, args.batch_size)
+
+
+@with_metrics
+def cmd_analyze(args):
+    if args.listen:
+        import signal
+        import threading
+        from analyze_sentiment import listen
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        signal.signal(signal.SIGINT, lambda *_: stop.set())
+        listen(stop)
+        return
+    from analyze_sentiment import run_analysis
+    run_analysis()
+
+
+def cmd_relabel(args):
+    from analyze_sentiment import relabel
+    relabel(args.positive, args.negative)
+    if args.rollup:
+        from rollup import refresh_rollup
+        refresh_rollup(full=True)
+
+
+def cmd_clean(args):
+    from clean_data import run_clean
+    run_clean()
+
+
+def cmd_rollup(args):
+    from rollup import refresh_rollup
+    refresh_rollup(args.days, args.full)
+
+
+def cmd_archive(args):
+    from cold_archive import archive
+    archive(args.months, args.keep)
+
+
+def cmd_sync(args):
+    from analytics_db import sync
+    sync(args.full)
+
+
+def cmd_snapshot(args):
+    from snapshot import snapshot
+    snapshot(args.full)
+
+
+def cmd_export(args):
+    from export_news import export_csv
+    export_csv(args.output, args.since, args.until, args.country)
+
+
+def cmd_replay(args):
+    from raw_archive import replay
+    replay(args.start, args.end or args.start)
+
+
+def cmd_import(args):
+    from import_bulk import import_file
+    for path in args.paths:
+        inserted = import_file(path, args.workers, args.chunk_lines)
+        print(f"Imported {inserted} articles from {path}")
+
+
+def cmd_spool(args):
+    import os
+    from fetch_news import save_to_db
+    from spool import Spool
+    spool = Spool(writer=save_to_db)
+    if args.action == "flush":
+        return 0 if spool.flush() else 1
+    for path in spool.pending_segments():
+        print(f"{os.path.basename(path)}\t{os.path.getsize(path)} bytes")
+
+
+def cmd_daemon(args):
+    from daemon import run_daemon
+    run_daemon(args.countries, args.jobs, args.listen)
+
+
+def cmd_bench(args):
+    import bench
+    return bench.run(bench.build_parser().parse_args(args.bench_args))
+
+
+def cmd_selftest(args):
+    from analyze_sentiment import selftest
+    selftest()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="globalnews", description="Global news sentiment pipeline")
+    parser.add_argument("--profile", action="store_true",
+                        help="write per-stage CPU profiles to data/profiles/")
+    parser.add_argument("--memprofile", action="store_true",
+                        help="log tracemalloc snapshots around each batch")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("fetch", help="fetch NewsAPI headlines")
+    p.add_argument("--countries", nargs="+", default=["us", "gb"])
+    p.add_argument("--categories", nargs="+")
+    p.set_defaults(handler=cmd_fetch)
+
+    p = commands.add_parser("rss", help="fetch RSS/Atom feeds")
+    p.add_argument("--feeds", help="CSV with url,country columns")
+    p.add_argument("--workers", type=int, default=32)
+    p.set_defaults(handler=cmd_rss)
+
+    p = commands.add_parser("pipeline", help="fetch, clean, score and store in one pass")
+    p.add_argument("--countries", nargs="+", default=["us", "gb"])
+    p.add_argument("--batch-size", type=int, default=500)
+    p.set_defaults(handler=cmd_pipeline)
+
+    p = commands.add_parser("analyze", help="score unanalyzed articles")
+    p.add_argument("--listen", action="store_true",
+                   help="stay resident and score new rows as they are inserted")
+    p.set_defaults(handler=cmd_analyze)
+
+    p = commands.add_parser("relabel", help="recompute sentiment labels from stored scores")
+    p.add_argument("--positive", type=float,
+                   help="default: SENTIMENT_POSITIVE_THRESHOLD or 0.1")
+    p.add_argument("--negative", type=float,
+                   help="default: SENTIMENT_NEGATIVE_THRESHOLD or -0.1")
+    p.add_argument("--no-rollup", dest="rollup", action="store_false",
+                   help="skip rebuilding news_daily_rollup afterwards")
+    p.set_defaults(handler=cmd_relabel)
+
+    p = commands.add_parser("clean", help="clean stored articles")
+    p.set_defaults(handler=cmd_clean)
+
+    p = commands.add_parser("rollup", help="refresh news_daily_rollup")
+    p.add_argument("--days", type=int, default=3)
+    p.add_argument("--full", action="store_true")
+    p.set_defaults(handler=cmd_rollup)
+
+    p = commands.add_parser("archive", help="move old months to Parquet")
+    p.add_argument("--months", type=int,
+                   help="default: ARCHIVE_RETENTION_MONTHS or 12")
+    p.add_argument("--keep", action="store_true",
+                   help="write the Parquet files but leave the rows in Postgres")
+    p.set_defaults(handler=cmd_archive)
+
+    p = commands.add_parser("sync", help="copy scored articles into the DuckDB analytics file")
+    p.add_argument("--full", action="store_true",
+                   help="rebuild from the Parquet archive and Postgres")
+    p.set_defaults(handler=cmd_sync)
+
+    p = commands.add_parser("snapshot", help="append scored articles to the Arrow snapshot")
+    p.add_argument("--full", action="store_true",
+                   help="rebuild from the Parquet archive and Postgres")
+    p.set_defaults(handler=cmd_snapshot)
+
+    p = commands.add_parser("export", help="export scored articles to CSV")
+    p.add_argument("--output")
+    p.add_argument("--since", type=date.fromisoformat)
+    p.add_argument("--until", type=date.fromisoformat)
+    p.add_argument("--country")
+    p.set_defaults(handler=cmd_export)
+
+    p = commands.add_parser("replay", help="re-ingest archived raw responses")
+    p.add_argument("--start", type=date.fromisoformat, required=True)
+    p.add_argument("--end", type=date.fromisoformat)
+    p.set_defaults(handler=cmd_replay)
+
+    p = commands.add_parser("import", help="import zipped GDELT-style exports")
+    p.add_argument("paths", nargs="+")
+    p.add_argument("--workers", type=int)
+    p.add_argument("--chunk-lines", type=int, default=50000)
+    p.set_defaults(handler=cmd_import)
+
+    p = commands.add_parser("spool", help="inspect or flush the article spool")
+    p.add_argument("action", choices=["status", "flush"])
+    p.set_defaults(handler=cmd_spool)
+
+    p = commands.add_parser("daemon", help="run jobs on a schedule")
+    p.add_argument("--countries", nargs="+", default=["us", "gb"])
+    p.add_argument("--jobs", nargs="+", default=["fetch", "analyze", "rollup", "clean"],
+                   choices=["fetch", "analyze", "rollup", "clean", "sync"])
+    p.add_argument("--listen", action="store_true",
+                   help="score new rows on NOTIFY instead of the analyze interval")
+    p.set_defaults(handler=cmd_daemon)
+
+    p = commands.add_parser("bench", help="run benchmarks (see bench.py --help)",
+                            add_help=False)
+    p.add_argument("bench_args", nargs=argparse.REMAINDER)
+    p.set_defaults(handler=cmd_bench)
+
+    p = commands.add_parser("selftest", help="check the emotion lexicon")
+    p.set_defaults(handler=cmd_selftest)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.profile or args.memprofile:
+        import profiling
+        if args.profile:
+            profiling.enable()
+        if args.memprofile:
+            profiling.enable_memory()
+    return args.handler(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+# scripts/import_bulk.py
+import argparse
+import logging
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from urllib.parse import urlparse
+
+from db_utils import get_db_connection, copy_rows
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CHUNK_LINES = 50000
+
+# GDELT 2.0 event export layout (tab separated, no header)
+COL_COUNTRY = 53     # ActionGeo_CountryCode (FIPS 10-4)
+COL_DATEADDED = 59   # YYYYMMDDHHMMSS
+COL_SOURCEURL = 60
+
+# GDELT uses FIPS country codes; news.country holds ISO 3166 alpha-2
+FIPS_TO_ISO = {
+    "US": "us", "UK": "gb", "IN": "in", "CH": "cn", "BR": "br",
+    "FR": "fr", "GM": "de", "JA": "jp", "CA": "ca", "AS": "au",
+    "RS": "ru", "IT": "it", "SP": "es", "MX": "mx", "EI": "ie",
+}
+
+STAGE_COLUMNS = ("source", "url", "published_at", "country")
+
+
+def parse_chunk(lines):
+    """Turn raw export lines into news rows (runs in a worker process)"""
+    rows = []
+    for line in lines:
+        fields = line.decode("utf-8", errors="replace").rstrip("\r\n").split("\t")
+        if len(fields) <= COL_SOURCEURL:
+            continue
+        url = fields[COL_SOURCEURL]
+        if not url.startswith("http"):
+            continue
+        try:
+            published = datetime.strptime(fields[COL_DATEADDED], "%Y%m%d%H%M%S")
+        except ValueError:
+            continue
+        domain = urlparse(url).netloc.lower()
+        if domain.startswith("www."):
+            domain = domain[4:]
+        rows.append((domain, url, published, FIPS_TO_ISO.get(fields[COL_COUNTRY])))
+    return rows
+
+
+def iter_chunks(stream, chunk_lines=CHUNK_LINES):
+    chunk = []
+    for line in stream:
+        chunk.append(line)
+        if len(chunk) >= chunk_lines:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def completed_members(cur, file_name):
+    cur.execute("SELECT member FROM import_progress WHERE file_name = %s",
+                (file_name,))
+    return {member for (member,) in cur.fetchall()}
+
+
+def import_member(cur, archive, member, pool, workers, chunk_lines):
+    """Stream one archive member through the pool into the staging table"""
+    cur.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS news_import_stage (
+            source TEXT,
+            url TEXT,
+            published_at TIMESTAMP,
+            country VARCHAR(2)
+        ) ON COMMIT DELETE ROWS
+    """)
+
+    staged = 0
+    pending = deque()
+    with archive.open(member) as stream:
+        for chunk in iter_chunks(stream, chunk_lines):
+            pending.append(pool.submit(parse_chunk, chunk))
+            # Bound the queue so a huge member never sits in memory at once
+            if len(pending) >= workers * 2:
+                rows = pending.popleft().result()
+                copy_rows(cur, "news_import_stage", STAGE_COLUMNS, rows)
+                staged += len(rows)
+        while pending:
+            rows = pending.popleft().result()
+            copy_rows(cur, "news_import_stage", STAGE_COLUMNS, rows)
+            staged += len(rows)
+
+    # Resolve source domains in one statement (see dimensions.py)
+    cur.execute("""
+        INSERT INTO sources (name)
+        SELECT DISTINCT source FROM news_import_stage WHERE source IS NOT NULL
+        ORDER BY 1
+        ON CONFLICT (name) DO NOTHING
+    """)
+    # Export files repeat a URL once per event, keep the earliest
+    cur.execute("""
+        INSERT INTO news_core (source_id, url, published_at, country)
+        SELECT DISTINCT ON (stage.url) sources.id, stage.url, stage.published_at, stage.country
+        FROM news_import_stage AS stage
+        LEFT JOIN sources ON sources.name = stage.source
+        ORDER BY stage.url, stage.published_at
+        ON CONFLICT (url) DO NOTHING
+    """)
+    return staged, cur.rowcount
+
+
+def import_file(path, workers=None, chunk_lines=CHUNK_LINES):
+    """Import every member of a zipped export; finished members are skipped"""
+    file_name = os.path.basename(path)
+    workers = workers or os.cpu_count()
+    total = 0
+    with get_db_connection() as conn, \
+            ProcessPoolExecutor(max_workers=workers) as pool, \
+            zipfile.ZipFile(path) as archive:
+        with conn.cursor() as cur:
+            done = completed_members(cur, file_name)
+            members = [m for m in archive.namelist() if not m.endswith("/")]
+            for index, member in enumerate(members, start=1):
+                if member in done:
+                    logger.info(f"[{file_name}] {index}/{len(members)} {member}: already imported")
+                    continue
+                staged, inserted = import_member(
+                    cur, archive, member, pool, workers, chunk_lines)
+                cur.execute("""
+                    INSERT INTO import_progress (file_name, member, rows_loaded)
+                    VALUES (%s, %s, %s)
+                """, (file_name, member, inserted))
+                # One transaction per member: a crash resumes at this member
+                conn.commit()
+                total += inserted
+                logger.info(f"[{file_name}] {index}/{len(members)} {member}: "
+                            f"{staged} rows parsed, {inserted} new articles")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Import zipped GDELT-style export files into news")
+    parser.add_argument("paths", nargs="+", help="local .zip export files")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-lines", type=int, default=CHUNK_LINES)
+    args = parser.parse_args()
+
+    for path in args.paths:
+        inserted = import_file(path, args.workers, args.chunk_lines)
+        print(f"Imported {inserted} articles from {path}")
@@ -0,0 +1,50 @@
+# scripts/metrics.py
+# Pipeline counters and latency histograms in Prometheus format.
+# Set METRICS_PORT to serve /metrics while a process runs, and/or
+# METRICS_TEXTFILE to write a .prom file for node-exporter's textfile
+# collector when a scheduled run finishes.
+import os
+
+from prometheus_client import (CollectorRegistry, Counter, Histogram,
+                               start_http_server, write_to_textfile)
+
+REGISTRY = CollectorRegistry()
+
+HTTP_REQUESTS = Counter(
+    "globalnews_http_requests_total", "News API requests",
+    ["country", "status"], registry=REGISTRY)
+HTTP_LATENCY = Histogram(
+    "globalnews_http_request_seconds", "News API request latency",
+    ["country"], registry=REGISTRY)
+ARTICLES_FETCHED = Counter(
+    "globalnews_articles_fetched_total", "Articles kept after watermark filtering",
+    ["country"], registry=REGISTRY)
+ROWS_INSERTED = Counter(
+    "globalnews_rows_inserted_total", "Rows inserted into news", registry=REGISTRY)
+ROWS_UPDATED = Counter(
+    "globalnews_rows_updated_total", "Existing rows rewritten because their content changed",
+    registry=REGISTRY)
+ROWS_SKIPPED = Counter(
+    "globalnews_rows_skipped_total", "Rows unchanged (or duplicated) on conflict",
+    registry=REGISTRY)
+ARTICLES_SCORED = Counter(
+    "globalnews_articles_scored_total", "Articles given sentiment and emotions",
+    registry=REGISTRY)
+DB_ROUNDTRIP = Histogram(
+    "globalnews_db_roundtrip_seconds", "Database statement round-trip time",
+    ["operation"], registry=REGISTRY,
+    buckets=(.001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30))
+
+
+def start_metrics_server():
+    """Serve /metrics on METRICS_PORT, if set"""
+    port = os.getenv("METRICS_PORT")
+    if port:
+        start_http_server(int(port), registry=REGISTRY)
+
+
+def write_metrics_textfile():
+    """Dump the registry to METRICS_TEXTFILE, if set (written atomically)"""
+    path = os.getenv("METRICS_TEXTFILE")
+    if path:
+        write_to_textfile(path, REGISTRY)
@@ -0,0 +1,17 @@
+# scripts/news_schema.py
+# Column layout of the news tables shared by writers (fetch_news,
+# analyze_sentiment) and readers (export, dashboards). Import-light on
+# purpose: no database or NLP dependencies.
+
+# One REAL column per emotion, emotion_<name>. NULL means the emotion
+# wasn't found, the same as a key missing from the old JSONB column.
+EMOTIONS = ("joy", "anger", "sadness", "fear",
+            "surprise", "trust", "disgust", "anticipation")
+EMOTION_COLUMNS = tuple(f"emotion_{emotion}" for emotion in EMOTIONS)
+
+
+def emotion_values(emotions):
+    """analyze_emotions() dict (or None) -> values in EMOTION_COLUMNS order"""
+    emotions = emotions or {}
+    return tuple(emotions.get(emotion) for emotion in EMOTIONS)
+
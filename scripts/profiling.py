@@ -0,0 +1,312 @@
+# scripts/profiling.py
+# Opt-in per-stage profiling. Enable with GLOBALNEWS_PROFILE=1 (or by
+# calling enable()); each run then writes to data/profiles/<run>/:
+#   <stage>.prof   cProfile stats per stage (pstats / snakeviz)
+#   merged.prof    all stages together
+#   stacks.folded  sampled stacks prefixed by the innermost stage, for
+#                  flamegraph.pl or speedscope
+# When disabled, a wrapped call costs one global check.
+#
+# Memory mode (GLOBALNEWS_MEMPROFILE=1 or enable_memory()) is separate:
+# batch-level stages take tracemalloc snapshots on entry and exit, log
+# the top allocation sites, traced peak and process peak RSS, and the
+# run writes memory.json next to the CPU profiles. tracemalloc is
+# process-wide, so stages that overlap another thread's are marked
+# "concurrent": their figures include that thread's memory.
+import atexit
+import cProfile
+import functools
+import json
+import logging
+import os
+import pstats
+import resource
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "..", "data", "profiles")
+SAMPLE_INTERVAL = 0.005
+
+TOP_ALLOCATIONS = 10
+
+_enabled = False
+_memory = False
+_output_dir = None
+_lock = threading.Lock()
+_profilers = {}      # (stage, thread id) -> cProfile.Profile
+_stacks = {}         # thread id -> [(stage, profiler or None), ...]
+_samples = Counter()
+_stop = threading.Event()
+
+
+_memory_stacks = {}  # thread id -> [open _MemoryStage, ...]
+_memory_report = []
+
+
+def _set_output_dir(output_dir):
+    global _output_dir
+    if _output_dir is None:
+        run = f"{datetime.now():%Y%m%dT%H%M%S}-{os.getpid()}"
+        _output_dir = output_dir or os.path.join(PROFILE_DIR, run)
+
+
+def enable(output_dir=None):
+    """Start profiling stages for the rest of this process"""
+    global _enabled
+    if _enabled:
+        return
+    _set_output_dir(output_dir)
+    _enabled = True
+    threading.Thread(target=_sample_loop, name="profiling-sampler",
+                     daemon=True).start()
+    atexit.register(write_profiles)
+    logger.info(f"Profiling enabled, writing to {_output_dir}")
+
+
+def is_enabled():
+    return _enabled
+
+
+class _Stage:
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        tid = threading.get_ident()
+        stack = _stacks.setdefault(tid, [])
+        # Only one cProfile can be active per thread: pause the outer stage
+        if stack and stack[-1][1] is not None:
+            stack[-1][1].disable()
+        with _lock:
+            profiler = _profilers.setdefault((self.name, tid), cProfile.Profile())
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler owns the interpreter (Python 3.12+ allows
+            # only one); the sampler still covers this stage
+            profiler = None
+        stack.append((self.name, profiler))
+        return self
+
+    def __exit__(self, *exc):
+        stack = _stacks[threading.get_ident()]
+        _, profiler = stack.pop()
+        if profiler is not None:
+            profiler.disable()
+        if stack and stack[-1][1] is not None:
+            stack[-1][1].enable()
+        return False
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def profile_stage(name):
+    """Context manager around one stage; a shared no-op when disabled"""
+    return _Stage(name) if _enabled else _NULL_STAGE
+
+
+def profiled(name):
+    """Decorator form of profile_stage"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def enable_memory(output_dir=None):
+    """Start tracemalloc and record memory around batch-level stages"""
+    global _memory
+    if _memory:
+        return
+    _set_output_dir(output_dir)
+    tracemalloc.start()
+    _memory = True
+    atexit.register(write_memory_report)
+    logger.info(f"Memory profiling enabled, writing to {_output_dir}")
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (Linux reports KiB)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _snapshot():
+    # Leave out tracemalloc's own bookkeeping
+    return tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__)])
+
+
+def _fold_peak():
+    """Fold the traced peak into every open memory stage (hold _lock).
+
+    tracemalloc's peak and reset_peak are process-wide, so before anyone
+    resets it, each open stage on every thread takes what it has seen.
+    """
+    peak = tracemalloc.get_traced_memory()[1]
+    for stack in _memory_stacks.values():
+        for stage in stack:
+            stage.peak = max(stage.peak, peak)
+
+
+class _MemoryStage:
+    def __init__(self, name):
+        self.name = name
+        self.peak = 0
+        self.concurrent = False
+
+    def __enter__(self):
+        tid = threading.get_ident()
+        self.before = _snapshot()
+        with _lock:
+            _fold_peak()
+            tracemalloc.reset_peak()
+            for other, stack in _memory_stacks.items():
+                if other != tid and stack:
+                    self.concurrent = True
+                    for stage in stack:
+                        stage.concurrent = True
+            _memory_stacks.setdefault(tid, []).append(self)
+        return self
+
+    def __exit__(self, *exc):
+        tid = threading.get_ident()
+        with _lock:
+            _fold_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            stack = _memory_stacks[tid]
+            stack.pop()
+            if not stack:
+                del _memory_stacks[tid]
+        peak = self.peak
+        top = _snapshot().compare_to(self.before, "lineno")[:TOP_ALLOCATIONS]
+        record = {
+            "stage": self.name,
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "traced_peak_mb": round(peak / 2**20, 2),
+            "traced_current_mb": round(current / 2**20, 2),
+            "peak_rss_mb": peak_rss_mb(),
+            # Other threads ran stages meanwhile: the traced figures and
+            # allocation sites include their memory too
+            "concurrent": self.concurrent,
+            "top_allocations": [
+                {"site": str(stat.traceback[0]),
+                 "size_diff_kb": round(stat.size_diff / 1024, 1),
+                 "count_diff": stat.count_diff}
+                for stat in top
+            ],
+        }
+        _memory_report.append(record)
+        logger.info(f"[memory] {self.name}: traced peak {record['traced_peak_mb']} MB, "
+                    f"peak RSS {record['peak_rss_mb']} MB"
+                    + (" (concurrent stages)" if self.concurrent else ""))
+        for stat in top[:3]:
+            logger.info(f"[memory]   {stat}")
+        return False
+
+
+def memory_stage(name):
+    """Context manager around one batch; a shared no-op unless memory mode is on"""
+    return _MemoryStage(name) if _memory else _NULL_STAGE
+
+
+def memory_profiled(name):
+    """Decorator form of memory_stage"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _memory:
+                return func(*args, **kwargs)
+            with _MemoryStage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def write_memory_report():
+    if not _memory_report:
+        return
+    os.makedirs(_output_dir, exist_ok=True)
+    with open(os.path.join(_output_dir, "memory.json"), "w") as f:
+        json.dump(_memory_report, f, indent=2)
+
+
+def _sample_loop():
+    while not _stop.wait(SAMPLE_INTERVAL):
+        frames = sys._current_frames()
+        for tid, stack in list(_stacks.items()):
+            # The owning thread pushes and pops meanwhile: copy the stack
+            # once (atomic under the GIL) and use only the copy. The
+            # innermost stage is the one running.
+            stages = list(stack)
+            frame = frames.get(tid)
+            if not stages or frame is None:
+                continue
+            stage = stages[-1][0]
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}"
+                             f":{code.co_firstlineno})")
+                frame = frame.f_back
+            _samples[";".join([stage] + names[::-1])] += 1
+
+
+def write_profiles():
+    """Dump per-stage, merged and folded-stack profiles for this run"""
+    if not _enabled or not _profilers:
+        return
+    _stop.set()
+    os.makedirs(_output_dir, exist_ok=True)
+
+    by_stage = {}
+    for (stage, _), profiler in list(_profilers.items()):
+        by_stage.setdefault(stage, []).append(profiler)
+
+    merged = pstats.Stats()
+    for stage, profilers in by_stage.items():
+        stats = pstats.Stats()
+        for profiler in profilers:
+            profiler.disable()
+            profiler.create_stats()
+            try:
+                stats.add(profiler)
+                merged.add(profiler)
+            except TypeError:
+                # Nothing recorded (see _Stage.__enter__)
+                continue
+        if stats.stats:
+            stats.dump_stats(os.path.join(_output_dir, f"{stage}.prof"))
+    if merged.stats:
+        merged.dump_stats(os.path.join(_output_dir, "merged.prof"))
+
+    with open(os.path.join(_output_dir, "stacks.folded"), "w") as f:
+        for stack, count in sorted(_samples.items()):
+            f.write(f"{stack} {count}\n")
+    logger.info(f"Wrote profiles for {len(by_stage)} stages to {_output_dir}")
+
+
+if os.getenv("GLOBALNEWS_PROFILE", "") not in ("", "0"):
+    enable()
+if os.getenv("GLOBALNEWS_MEMPROFILE", "") not in ("", "0"):
+    enable_memory()
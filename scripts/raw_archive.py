@@ -0,0 +1,96 @@
+# scripts/raw_archive.py
+import argparse
+import io
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta
+
+import zstandard
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RAW_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       "..", "data", "raw")
+COMPRESSION_LEVEL = 9
+
+_compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL)
+
+
+def archive_path(day, source="newsapi"):
+    """data/raw/date=YYYY-MM-DD/<source>.jsonl.zst"""
+    return os.path.join(RAW_DIR, f"date={day.isoformat()}", f"{source}.jsonl.zst")
+
+
+def archive_response(payload, country, category, fetched_at=None, source="newsapi"):
+    """Append one raw API response to the day's archive file.
+
+    Every call writes a self-contained zstd frame, so appends never
+    rewrite earlier data and a torn write only loses the last record.
+    """
+    fetched_at = fetched_at or datetime.utcnow()
+    record = {
+        "fetched_at": fetched_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "source": source,
+        "country": country,
+        "category": category,
+        "response": payload
+    }
+    path = archive_path(fetched_at.date(), source)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    line = json.dumps(record, separators=(",", ":")) + "\n"
+    with open(path, "ab") as f:
+        f.write(_compressor.compress(line.encode("utf-8")))
+
+
+def iter_archive(start, end, source="newsapi"):
+    """Yield archived records from start to end (inclusive) in fetch order"""
+    decompressor = zstandard.ZstdDecompressor()
+    day = start
+    while day <= end:
+        path = archive_path(day, source)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                reader = decompressor.stream_reader(f, read_across_frames=True)
+                for line in io.TextIOWrapper(reader, encoding="utf-8"):
+                    if line.strip():
+                        yield json.loads(line)
+        day += timedelta(days=1)
+
+
+def replay(start, end, batch_size=5000):
+    """Re-ingest archived responses through the bulk writer"""
+    from fetch_news import save_to_db
+
+    batch = []
+    total = inserted = 0
+    for record in iter_archive(start, end):
+        for article in record["response"].get("articles", []):
+            article["country"] = record["country"]
+            article["category"] = record["category"]
+            batch.append(article)
+        if len(batch) >= batch_size:
+            inserted += save_to_db(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        inserted += save_to_db(batch)
+        total += len(batch)
+
+    logger.info(f"Replayed {total} articles ({inserted} new) from {start} to {end}")
+    return inserted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Raw NewsAPI archive tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    replay_parser = commands.add_parser(
+        "replay", help="re-ingest a date range from data/raw")
+    replay_parser.add_argument("--start", type=date.fromisoformat, required=True)
+    replay_parser.add_argument("--end", type=date.fromisoformat,
+                               help="last day to replay (default: start)")
+    args = parser.parse_args()
+
+    if args.command == "replay":
+        replay(args.start, args.end or args.start)
@@ -0,0 +1,109 @@
+# scripts/rollup.py
+import argparse
+import logging
+from datetime import date, datetime, timedelta, timezone
+
+from db_utils import get_db_connection
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Late-scored articles land in recent days, so recompute a trailing window
+REFRESH_DAYS = 3
+
+
+def refresh_range(cur, since, until=None):
+    """Recompute the rollup for days in [since, until) from news_core.
+
+    Months whose rows were moved to Parquet (cold_archive.py) are left
+    alone: news_core no longer has the articles to recompute them from.
+    """
+    until = until or date.max
+    cur.execute("""
+        DELETE FROM news_daily_rollup
+        WHERE day >= %s AND day < %s
+        AND date_trunc('month', day)::date NOT IN (
+            SELECT month FROM news_archive WHERE NOT kept
+        )
+    """, (since, until))
+    cur.execute("""
+        INSERT INTO news_daily_rollup (
+            day, country, sentiment_label, articles, avg_sentiment
+        )
+        SELECT published_at::date, country, sentiment_label,
+               COUNT(*), AVG(sentiment_score)
+        FROM news_core
+        WHERE analyzed_at IS NOT NULL
+        AND published_at >= %s AND published_at < %s
+        AND date_trunc('month', published_at)::date NOT IN (
+            SELECT month FROM news_archive WHERE NOT kept
+        )
+        GROUP BY 1, 2, 3
+    """, (since, until))
+    return cur.rowcount
+
+
+def add_rows(cur, ids):
+    """Fold the given news_core rows into the rollup without recomputing
+    their days.
+
+    For rows that arrive late in months already archived: the rest of
+    those days is only in Parquet, so the stored counts are extended.
+    Averages are weighted by article count.
+    """
+    cur.execute("""
+        WITH late AS (
+            SELECT published_at::date AS day, country, sentiment_label,
+                   COUNT(*) AS articles, AVG(sentiment_score) AS avg_sentiment
+            FROM news_core
+            WHERE id = ANY(%s)
+            GROUP BY 1, 2, 3
+        ), merged AS (
+            UPDATE news_daily_rollup AS r
+            SET avg_sentiment = CASE
+                    WHEN r.avg_sentiment IS NULL THEN late.avg_sentiment
+                    WHEN late.avg_sentiment IS NULL THEN r.avg_sentiment
+                    ELSE (r.avg_sentiment * r.articles + late.avg_sentiment * late.articles)
+                         / (r.articles + late.articles)
+                END,
+                articles = r.articles + late.articles
+            FROM late
+            WHERE r.day = late.day
+            AND r.country IS NOT DISTINCT FROM late.country
+            AND r.sentiment_label IS NOT DISTINCT FROM late.sentiment_label
+            RETURNING r.day, r.country, r.sentiment_label
+        )
+        INSERT INTO news_daily_rollup (
+            day, country, sentiment_label, articles, avg_sentiment
+        )
+        SELECT day, country, sentiment_label, articles, avg_sentiment
+        FROM late
+        WHERE NOT EXISTS (
+            SELECT 1 FROM merged
+            WHERE merged.day = late.day
+            AND merged.country IS NOT DISTINCT FROM late.country
+            AND merged.sentiment_label IS NOT DISTINCT FROM late.sentiment_label
+        )
+    """, (list(ids),))
+
+
+def refresh_rollup(days=REFRESH_DAYS, full=False):
+    """Recompute news_daily_rollup for the last `days` days (or everything);
+    see refresh_range for archived months"""
+    # published_at is stored in UTC
+    today = datetime.now(timezone.utc).date()
+    since = date(1970, 1, 1) if full else today - timedelta(days=days)
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            rows = refresh_range(cur, since)
+        conn.commit()
+    logger.info(f"Rolled up {rows} (day, country, label) groups since {since}")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh news_daily_rollup")
+    parser.add_argument("--days", type=int, default=REFRESH_DAYS)
+    parser.add_argument("--full", action="store_true", help="rebuild all days")
+    args = parser.parse_args()
+    refresh_rollup(args.days, args.full)
@@ -0,0 +1,78 @@
+# scripts/run_ledger.py
+import logging
+import socket
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from psycopg2 import extras
+from db_utils import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+
+class Run:
+    """Timings and counts collected while a job runs"""
+
+    def __init__(self, job, analyzer_version=None):
+        self.job = job
+        self.analyzer_version = analyzer_version
+        self.started_at = datetime.utcnow()
+        self.stage_seconds = {}
+        self.items_in = None
+        self.items_out = None
+        self.errors = 0
+        self.error_message = None
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block; repeated stages accumulate"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.stage_seconds[name] = round(
+                self.stage_seconds.get(name, 0.0) + elapsed, 4)
+
+
+def save_run(run):
+    """Insert the ledger row, with the analyzer backlog at finish time"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM news_core WHERE analyzed_at IS NULL")
+            backlog = cur.fetchone()[0]
+            cur.execute("""
+                INSERT INTO pipeline_runs (
+                    job, started_at, finished_at, stage_seconds,
+                    items_in, items_out, errors, error_message,
+                    backlog, analyzer_version, host
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """, (
+                run.job, run.started_at, datetime.utcnow(),
+                extras.Json(run.stage_seconds), run.items_in, run.items_out,
+                run.errors, run.error_message, backlog,
+                run.analyzer_version, socket.gethostname()
+            ))
+        conn.commit()
+
+
+@contextmanager
+def record_run(job, analyzer_version=None):
+    """Record a pipeline_runs row for the enclosed job.
+
+    Failures are recorded and re-raised; a failure to write the ledger
+    itself is only logged, so bookkeeping never breaks a run.
+    """
+    run = Run(job, analyzer_version)
+    try:
+        yield run
+    except Exception as e:
+        run.errors += 1
+        run.error_message = str(e)[:1000]
+        raise
+    finally:
+        try:
+            save_run(run)
+        except Exception as e:
+            logger.warning(f"Could not record {job} run: {e}")
@@ -0,0 +1,194 @@
+# scripts/snapshot.py
+# Arrow IPC (Feather v2) snapshot of the analytical columns of news, for
+# notebooks. Files are uncompressed so load_snapshot() can memory-map
+# them and hand pandas Arrow-backed columns without copying. Layout in
+# data/snapshot/:
+#   000001-base.arrow    full copy
+#   000002-delta.arrow   rows analyzed since the previous file
+# Readers take the newest base and the deltas after it (snapshot.R does
+# the same), so a crash mid-rewrite never leaves duplicates behind.
+import argparse
+import logging
+import os
+from datetime import timedelta
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from cold_archive import SCHEMA as ARCHIVE_SCHEMA, UNKNOWN_COUNTRY, archive_dataset
+from db_utils import get_db_connection
+from news_schema import EMOTION_COLUMNS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "data", "snapshot"))
+BATCH_SIZE = 50_000
+# Rewrite into a single base once there are this many deltas
+MAX_DELTAS = int(os.getenv("SNAPSHOT_MAX_DELTAS", 50))
+# See analytics_db.SYNC_OVERLAP
+OVERLAP = timedelta(minutes=10)
+
+COLUMNS = ("id", "source_id", "source", "published_at", "country",
+           "sentiment_score", "sentiment_subjectivity", "sentiment_label",
+           *EMOTION_COLUMNS, "analyzed_at")
+SCHEMA = pa.schema([ARCHIVE_SCHEMA.field(name) if name != "country"
+                    else pa.field("country", pa.string())
+                    for name in COLUMNS])
+
+
+def snapshot_files():
+    """Paths of the newest base and the deltas after it, oldest first"""
+    if not os.path.isdir(SNAPSHOT_DIR):
+        return []
+    names = sorted(name for name in os.listdir(SNAPSHOT_DIR) if name.endswith(".arrow"))
+    bases = [i for i, name in enumerate(names) if name.endswith("-base.arrow")]
+    if not bases:
+        return []
+    return [os.path.join(SNAPSHOT_DIR, name) for name in names[bases[-1]:]]
+
+
+def read_snapshot(columns=None):
+    """The snapshot as a memory-mapped pyarrow Table (one chunk per file)"""
+    tables = []
+    for path in snapshot_files():
+        table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+        tables.append(table.select(list(columns)) if columns else table)
+    if not tables:
+        schema = pa.schema([SCHEMA.field(name) for name in columns]) if columns else SCHEMA
+        return schema.empty_table()
+    return pa.concat_tables(tables)
+
+
+def load_snapshot(columns=None):
+    """The snapshot as a DataFrame of pd.ArrowDtype columns.
+
+    The columns wrap the memory-mapped buffers, so opening millions of
+    rows costs page faults rather than a copy; pandas operations that
+    need NumPy arrays still convert the columns they touch.
+    """
+    import pandas as pd
+    return read_snapshot(columns).to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def _next_path(kind):
+    files = sorted(name for name in os.listdir(SNAPSHOT_DIR) if name.endswith(".arrow"))
+    seq = int(files[-1].split("-")[0]) + 1 if files else 1
+    return os.path.join(SNAPSHOT_DIR, f"{seq:06d}-{kind}.arrow")
+
+
+def _write(kind, batches):
+    """Write `batches` as the next base/delta file; returns the row count"""
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    path = _next_path(kind)
+    tmp_path = os.path.join(SNAPSHOT_DIR, f".{os.path.basename(path)}.tmp")
+    rows = 0
+    with pa.ipc.new_file(tmp_path, SCHEMA) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    os.replace(tmp_path, path)
+    if kind == "base":
+        # Everything before the new base is superseded. Files still mapped
+        # (Windows won't delete them) are ignored by readers and retried
+        # next time.
+        for name in os.listdir(SNAPSHOT_DIR):
+            if name.endswith(".arrow") and name < os.path.basename(path):
+                try:
+                    os.remove(os.path.join(SNAPSHOT_DIR, name))
+                except OSError as e:
+                    logger.warning(f"Could not remove {name}: {e}")
+    logger.info(f"Wrote {rows} articles to {path}")
+    return rows
+
+
+def _fetch_batches(since=None):
+    """Analyzed rows from Postgres as record batches, streamed"""
+    query = f"SELECT {', '.join(COLUMNS)} FROM news WHERE analyzed_at IS NOT NULL"
+    params = None
+    if since is not None:
+        query += " AND analyzed_at > %s"
+        params = (since,)
+    with get_db_connection() as conn:
+        with conn.cursor(name="snapshot") as cur:
+            cur.itersize = BATCH_SIZE
+            cur.execute(query, params)
+            while True:
+                rows = cur.fetchmany(BATCH_SIZE)
+                if not rows:
+                    break
+                yield from pa.Table.from_pydict(
+                    {name: list(values) for name, values in zip(COLUMNS, zip(*rows))},
+                    schema=SCHEMA).to_batches()
+        conn.rollback()
+
+
+def _full_batches():
+    """The Parquet archive (cold_archive.py), then Postgres"""
+    archived_ids = []
+    dataset = archive_dataset()
+    if dataset is not None:
+        for batch in dataset.to_batches(columns=list(COLUMNS), batch_size=BATCH_SIZE):
+            country = batch.column(COLUMNS.index("country"))
+            country = pc.if_else(pc.equal(country, UNKNOWN_COUNTRY),
+                                 pa.scalar(None, pa.string()), country)
+            arrays = [country if name == "country" else batch.column(i)
+                      for i, name in enumerate(COLUMNS)]
+            archived_ids.append(arrays[0])
+            yield pa.RecordBatch.from_arrays(arrays, schema=SCHEMA)
+
+    # Rows archived with --keep are still in Postgres
+    archived_ids = pa.concat_arrays(archived_ids) if archived_ids else None
+    for batch in _fetch_batches():
+        if archived_ids is not None:
+            batch = batch.filter(pc.invert(pc.is_in(batch.column(0), value_set=archived_ids)))
+        yield batch
+
+
+def snapshot(full=False):
+    """Append rows analyzed since the last run (or rebuild); returns rows written.
+
+    Like analytics_db.sync, rows deleted from Postgres are kept and
+    `relabel` (which leaves analyzed_at alone) needs `full`.
+    """
+    existing = read_snapshot(["id", "analyzed_at"])
+    if full or existing.num_rows == 0:
+        return _write("base", _full_batches())
+
+    since = pc.max(existing["analyzed_at"]).as_py() - OVERLAP
+    new = pa.Table.from_batches(list(_fetch_batches(since)), schema=SCHEMA)
+    if new.num_rows == 0:
+        logger.info("Snapshot is up to date")
+        return 0
+
+    # Drop what the overlap re-read unchanged
+    known = existing.filter(pc.is_in(existing["id"], value_set=new["id"].combine_chunks()))
+    unchanged = set(zip(known["id"].to_pylist(), known["analyzed_at"].to_pylist()))
+    new = new.filter(pa.array([
+        key not in unchanged
+        for key in zip(new["id"].to_pylist(), new["analyzed_at"].to_pylist())
+    ], type=pa.bool_()))
+    if new.num_rows == 0:
+        logger.info("Snapshot is up to date")
+        return 0
+
+    new_ids = new["id"].combine_chunks()
+    rescored = pc.any(pc.is_in(known["id"], value_set=new_ids)).as_py()
+    if rescored or len(snapshot_files()) > MAX_DELTAS:
+        # Files are append-only: rewrite with the new versions in place
+        # of the old ones
+        current = read_snapshot()
+        current = current.filter(pc.invert(pc.is_in(current["id"], value_set=new_ids)))
+        merged = pa.concat_tables([current, new])
+        return _write("base", merged.to_batches(max_chunksize=BATCH_SIZE))
+    return _write("delta", new.to_batches())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Write scored articles to the Arrow snapshot in data/snapshot/")
+    parser.add_argument("--full", action="store_true",
+                        help="rebuild from the Parquet archive and Postgres")
+    args = parser.parse_args()
+    snapshot(args.full)
@@ -0,0 +1,190 @@
+# scripts/spool.py
+import argparse
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SPOOL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "..", "data", "spool")
+SEGMENT_MAX_BYTES = 8 * 1024 * 1024
+FSYNC_EVERY = 500        # records
+FSYNC_INTERVAL = 1.0     # seconds
+FLUSH_INTERVAL = 5.0
+MAX_BACKOFF = 300.0
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Spool:
+    """Write-ahead spool of fetched articles.
+
+    Articles are appended as JSON lines to a `.open` segment; full or
+    closed segments are renamed to `.seg` and replayed into the database
+    by `writer` (save_to_db). A segment is deleted only after the writer
+    returns, and the writer's ON CONFLICT makes a replay after a crash
+    harmless.
+    """
+
+    def __init__(self, writer, directory=SPOOL_DIR,
+                 segment_max_bytes=SEGMENT_MAX_BYTES):
+        self.writer = writer
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self._file = None
+        self._path = None
+        self._seq = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher = None
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+
+    def _recover(self):
+        """Seal segments left open by processes that are no longer running"""
+        for path in glob.glob(os.path.join(self.directory, "*.open")):
+            pid = int(os.path.basename(path).split("-")[1])
+            if pid != os.getpid() and not _pid_alive(pid):
+                os.replace(path, path[:-len(".open")] + ".seg")
+                logger.info(f"Recovered spool segment {os.path.basename(path)}")
+
+    def _open_segment(self):
+        self._seq += 1
+        name = f"{time.time_ns()}-{os.getpid()}-{self._seq:06d}.open"
+        self._path = os.path.join(self.directory, name)
+        self._file = open(self._path, "ab")
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, articles):
+        """Append articles to the spool; never touches the database"""
+        with self._lock:
+            for article in articles:
+                if self._file is None:
+                    self._open_segment()
+                line = json.dumps(article, separators=(",", ":"), default=str)
+                self._file.write(line.encode("utf-8") + b"\n")
+                self._unsynced += 1
+                if self._file.tell() >= self.segment_max_bytes:
+                    self._seal()
+            # Batch fsyncs: one per FSYNC_EVERY records or FSYNC_INTERVAL
+            if self._file is not None and (
+                    self._unsynced >= FSYNC_EVERY
+                    or time.monotonic() - self._last_sync >= FSYNC_INTERVAL):
+                self._sync()
+
+    def _seal(self):
+        """fsync and rename the open segment so the flusher can take it"""
+        if self._file is None:
+            return
+        self._sync()
+        self._file.close()
+        os.replace(self._path, self._path[:-len(".open")] + ".seg")
+        dir_fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+        self._file = None
+        self._path = None
+
+    def seal(self):
+        with self._lock:
+            self._seal()
+
+    def pending_segments(self):
+        return sorted(glob.glob(os.path.join(self.directory, "*.seg")))
+
+    def flush_segment(self, path):
+        """Write one sealed segment to the database, then delete it"""
+        articles = []
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    articles.append(json.loads(line))
+                except ValueError:
+                    # Torn final line from a crash before fsync
+                    logger.warning(f"Skipping unreadable line in {os.path.basename(path)}")
+        inserted = self.writer(articles) if articles else 0
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        return len(articles), inserted
+
+    def flush(self):
+        """Drain sealed segments; returns False if the database refused"""
+        for path in self.pending_segments():
+            try:
+                spooled, inserted = self.flush_segment(path)
+            except Exception as e:
+                logger.warning(f"Spool flush deferred: {e}")
+                return False
+            logger.info(f"Flushed {spooled} spooled articles ({inserted} new)")
+        return True
+
+    def _flush_loop(self, interval):
+        delay = interval
+        while True:
+            ok = self.flush()
+            # close() sets _stop: that wakes the wait below for one final pass
+            if self._stop.is_set():
+                return
+            delay = interval if ok else min(delay * 2, MAX_BACKOFF)
+            self._stop.wait(delay)
+
+    def start_flusher(self, interval=FLUSH_INTERVAL):
+        """Replay sealed segments in the background, backing off while the DB is down"""
+        self._flusher = threading.Thread(
+            target=self._flush_loop, args=(interval,), name="spool-flusher",
+            daemon=True)
+        self._flusher.start()
+
+    def close(self, timeout=30.0):
+        """Seal the open segment and give the flusher one last chance.
+
+        Anything still unflushed after `timeout` stays on disk for the
+        next run; the flusher is a daemon thread, so exit never waits on
+        a hung database.
+        """
+        self.seal()
+        if self._flusher is None:
+            return
+        self._stop.set()
+        self._flusher.join(timeout)
+
+
+if __name__ == "__main__":
+    from fetch_news import save_to_db
+
+    parser = argparse.ArgumentParser(description="Article spool tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("flush", help="write spooled articles to the database")
+    commands.add_parser("status", help="show pending spool segments")
+    args = parser.parse_args()
+
+    spool = Spool(writer=save_to_db)
+    if args.command == "flush":
+        ok = spool.flush()
+        raise SystemExit(0 if ok else 1)
+    for path in spool.pending_segments():
+        print(f"{os.path.basename(path)}\t{os.path.getsize(path)} bytes")
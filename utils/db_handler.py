@@ -0,0 +1,121 @@
+# utils/db_handler.py
+# Query results straight into typed DataFrames. pd.read_sql builds a
+# Python object per value before pandas converts them; here Postgres
+# streams the result with COPY ... TO STDOUT and pyarrow's multithreaded
+# CSV reader parses it into typed columns (or ADBC returns Arrow directly
+# when adbc_driver_postgresql is installed).
+import io
+from urllib.parse import quote
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+# Low-cardinality text: pandas Categorical (a few bytes per row, not an
+# object per row)
+CATEGORICAL_COLUMNS = ("country", "sentiment_label", "source", "author")
+# Scores don't need double precision: float32 halves their memory
+FLOAT32_COLUMNS = ("sentiment_score", "sentiment_subjectivity")
+FLOAT32_PREFIXES = ("emotion_",)
+
+
+# Postgres type OID -> Arrow type, so the CSV reader never guesses (a
+# text column of digits must stay text). Anything else is read as text.
+PG_TYPES = {
+    16: pa.bool_(),                # bool
+    20: pa.int64(),                # int8
+    21: pa.int16(),                # int2
+    23: pa.int32(),                # int4
+    700: pa.float32(),             # float4
+    701: pa.float64(),             # float8
+    1700: pa.float64(),            # numeric
+    1082: pa.date32(),             # date
+    1114: pa.timestamp("us"),      # timestamp
+    1184: pa.timestamp("us", tz="UTC"),  # timestamptz
+}
+
+
+def _target_type(name):
+    if name in CATEGORICAL_COLUMNS:
+        return pa.dictionary(pa.int32(), pa.string())
+    if name in FLOAT32_COLUMNS or name.startswith(FLOAT32_PREFIXES):
+        return pa.float32()
+    return None
+
+
+def _read_copy(conn, query):
+    """Result as an Arrow Table via COPY (FORMAT csv)"""
+    with conn.cursor() as cur:
+        # Column names and types without running the query
+        cur.execute(f"SELECT * FROM ({query}) AS q LIMIT 0")
+        columns = [(column.name, column.type_code) for column in cur.description]
+        buf = io.BytesIO()
+        cur.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)", buf)
+    buf.seek(0)
+    column_types = {name: _target_type(name) or PG_TYPES.get(type_code, pa.string())
+                    for name, type_code in columns}
+    return pacsv.read_csv(
+        buf,
+        # Article text often holds \r\n; COPY quotes it
+        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(
+            column_types=column_types,
+            # COPY writes NULL as an empty field and '' as "", so only
+            # unquoted empties are nulls
+            null_values=[""],
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=False,
+            true_values=["t"],
+            false_values=["f"],
+            # timestamptz comes out as "2025-07-01 10:00:00+00"
+            timestamp_parsers=[pacsv.ISO8601, "%Y-%m-%d %H:%M:%S%z"],
+        ))
+
+
+def _read_adbc(conn, query):
+    """Result as an Arrow Table via ADBC, on a connection built from conn's DSN"""
+    import adbc_driver_postgresql.dbapi
+
+    info = conn.info
+    uri = (f"postgresql://{quote(info.user, safe='')}:{quote(info.password or '', safe='')}"
+           f"@{info.host}:{info.port}/{info.dbname}")
+    with adbc_driver_postgresql.dbapi.connect(uri) as adbc_conn:
+        with adbc_conn.cursor() as cur:
+            cur.execute(query)
+            table = cur.fetch_arrow_table()
+
+    # ADBC keeps the Postgres types; apply the same narrowing as COPY
+    columns = []
+    for field, column in zip(table.schema, table.columns):
+        target = _target_type(field.name)
+        if target is None or column.type == target:
+            columns.append(column)
+        elif pa.types.is_dictionary(target):
+            columns.append(pc.dictionary_encode(column))
+        else:
+            columns.append(column.cast(target))
+    return pa.Table.from_arrays(columns, names=table.column_names)
+
+
+def read_arrow(conn, query, params=None, use_adbc=None):
+    """Run `query` (psycopg2 %s placeholders) and return a pyarrow Table.
+
+    Uses ADBC when the driver is installed (or when use_adbc=True), and
+    COPY otherwise. ADBC opens its own connection, so pass use_adbc=False
+    to see conn's temp tables or uncommitted writes.
+    """
+    with conn.cursor() as cur:
+        query = cur.mogrify(query, params).decode() if params else query
+    if use_adbc is None:
+        try:
+            import adbc_driver_postgresql.dbapi
+            use_adbc = True
+        except ImportError:
+            use_adbc = False
+    return _read_adbc(conn, query) if use_adbc else _read_copy(conn, query)
+
+
+def read_frame(conn, query, params=None, use_adbc=None):
+    """Like pd.read_sql(query, conn, params=params), with compact dtypes:
+    CATEGORICAL_COLUMNS as Categorical and scores as float32"""
+    return read_arrow(conn, query, params, use_adbc).to_pandas()